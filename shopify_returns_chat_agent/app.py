@@ -8,11 +8,15 @@ import os
 import uuid
 import logging
 from dotenv import load_dotenv
+from functools import lru_cache
 from datetime import datetime
 from pathlib import Path
 
 # Import the LLM Returns Chat Agent
-from llm_returns_chat_agent import LLMReturnsChatAgent
+from llm_returns_chat_agent import ORDER_CACHE_TTL, LLMReturnsChatAgent
+from tools.conversation_logger import ConversationLogger
+from tools.order_lookup import OrderLookup
+from tools.refund_processor import RefundProcessor
 
 # Load environment variables
 load_dotenv()
@@ -101,15 +105,12 @@ class ConversationStartRequest(BaseModel):
 # Store active conversations in memory (in production, use Redis or database)
 active_conversations: Dict[str, LLMReturnsChatAgent] = {}
 
+_REQUIRED_ENV_VARS = frozenset({'OPENAI_API_KEY', 'SHOPIFY_ADMIN_TOKEN', 'SHOPIFY_STORE_DOMAIN'})
+
 def get_agent_config():
     """Get configuration for the LLM agent from environment variables."""
-    required_vars = ['OPENAI_API_KEY', 'SHOPIFY_ADMIN_TOKEN', 'SHOPIFY_STORE_DOMAIN']
-    missing_vars = [var for var in required_vars if not os.getenv(var)]
-    
-    if missing_vars:
-        raise RuntimeError(f"Missing required environment variables: {', '.join(missing_vars)}")
-    
-    return {
+    # Read each variable once, then validate the snapshot
+    config = {
         'OPENAI_API_KEY': os.getenv('OPENAI_API_KEY'),
         'OPENAI_MODEL': os.getenv('OPENAI_MODEL', 'gpt-4o'),
         'OPENAI_PROJECT_ID': os.getenv('OPENAI_PROJECT_ID'),
@@ -117,6 +118,44 @@ def get_agent_config():
         'SHOPIFY_ADMIN_TOKEN': os.getenv('SHOPIFY_ADMIN_TOKEN'),
         'SHOPIFY_STORE_DOMAIN': os.getenv('SHOPIFY_STORE_DOMAIN'),
     }
+    missing_vars = sorted(_REQUIRED_ENV_VARS - {var for var, value in config.items() if value})
+
+    if missing_vars:
+        raise RuntimeError(f"Missing required environment variables: {', '.join(missing_vars)}")
+
+    return config
+
+@lru_cache(maxsize=1)
+def get_conversation_logger() -> ConversationLogger:
+    """Get the process-wide conversation logger shared by all agents.
+
+    Conversations are never evicted from active_conversations, so a logger
+    per agent would pin a log file and an index connection per conversation.
+    """
+    return ConversationLogger()
+
+@lru_cache(maxsize=1)
+def get_order_lookup() -> OrderLookup:
+    """Get the process-wide order lookup shared by all agents.
+
+    Its keep-alive session is reused across conversations instead of each
+    agent holding its own pooled connection for the life of the process.
+    """
+    config = get_agent_config()
+    return OrderLookup(
+        admin_token=config['SHOPIFY_ADMIN_TOKEN'],
+        store_domain=config['SHOPIFY_STORE_DOMAIN'],
+        cache_ttl=ORDER_CACHE_TTL,
+    )
+
+@lru_cache(maxsize=1)
+def get_refund_processor() -> RefundProcessor:
+    """Get the process-wide refund processor shared by all agents."""
+    config = get_agent_config()
+    return RefundProcessor(
+        admin_token=config['SHOPIFY_ADMIN_TOKEN'],
+        store_domain=config['SHOPIFY_STORE_DOMAIN'],
+    )
 
 def safe_sentry_call(func, *args, **kwargs):
     """Safely call Sentry functions only if Sentry is available"""
@@ -206,7 +245,12 @@ async def start_conversation(request: ConversationStartRequest):
         config = get_agent_config()
         
         # Create new agent instance
-        agent = LLMReturnsChatAgent(config)
+        agent = LLMReturnsChatAgent(
+            config,
+            logger=get_conversation_logger(),
+            order_lookup=get_order_lookup(),
+            refund_processor=get_refund_processor(),
+        )
         
         # Start conversation and get greeting
         greeting = agent.start_conversation()
@@ -286,10 +330,10 @@ async def chat_endpoint(request: ChatRequest):
                 logger.info(f"Processing chat request for conversation: {conversation_id}")
                 
                 # Process message with LLM agent
-                response_text = agent.process_message(request.message)
+                response_text = await agent.aprocess_message(request.message)
         else:
             logger.info(f"Processing chat request for conversation: {conversation_id}")
-            response_text = agent.process_message(request.message)
+            response_text = await agent.aprocess_message(request.message)
         
         # Log successful interaction
         logger.info(f"Chat response generated for conversation: {conversation_id}")
@@ -376,6 +420,13 @@ async def startup_event():
         logger.error(f"❌ LLM agent configuration invalid: {str(e)}")
         logger.error("Please check your environment variables")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close the Shopify connections shared by all agents."""
+    for get_client in (get_order_lookup, get_refund_processor):
+        if get_client.cache_info().currsize:
+            get_client().close()
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8080))
@@ -5,9 +5,12 @@ This enhanced version uses OpenAI's function calling capabilities to provide
 more natural conversations while still leveraging our specialized tools.
 """
 
+import asyncio
 import json
+import threading
 import uuid
 import os
+from functools import cached_property
 from typing import Dict, Any, List, Optional
 from openai import OpenAI
 from dotenv import load_dotenv
@@ -21,14 +24,170 @@ from tools.conversation_logger import ConversationLogger
 load_dotenv(override=True)
 
 
+_SYSTEM_PROMPT = """You are Maya, an AI returns assistant for an apparel e-commerce store. You're enthusiastic, empathetic, and genuinely want to help customers have a great experience.
+
+🎯 Your Personality:
+- Warm and conversational (like talking to a helpful friend)
+- Use emojis sparingly but effectively
+- Show empathy when customers are frustrated
+- Be proactive in offering solutions
+- Celebrate successful resolutions
+
+✨ Your Role:
+1. Help customers process returns and exchanges smoothly
+2. Look up order information when needed
+3. Check return eligibility with store policies
+4. Process approved refunds efficiently
+5. Turn potentially negative experiences into positive ones
+
+📋 Store Policies:
+- 30-day return window from order date
+- Items must be in original condition with tags
+- Free returns for defective items
+- Valid reasons: wrong size, defective, not as described, changed mind, damaged
+
+💬 Communication Style:
+- Use natural, conversational language
+- Ask clarifying questions to understand their needs
+- Provide clear next steps
+- Acknowledge their feelings ("I understand that's frustrating...")
+- Offer alternatives when possible
+- Keep responses concise but complete
+
+🚀 Always start by understanding what they need help with, then gather order information if needed."""
+
+# Opening turn sent on behalf of the customer to elicit the greeting
+_OPENING_USER_MESSAGE = "Hi there! I need help with something."
+
+_FALLBACK_GREETING = (
+    "Hi there! ✨ I'm Maya, your AI returns assistant. I'm here to make returns and exchanges super easy for you! "
+    "Whether you need to return something, check an order, or just have questions about our policies, I'm here to help. "
+    "What can I assist you with today?"
+)
+
+_ERROR_MESSAGE = (
+    "I apologize, but I'm experiencing some technical difficulties. "
+    "Please try again in a moment, or contact our customer service team directly."
+)
+
+# Seconds an order fetched by ID is reused; covers the repeat lookups the
+# model makes while checking eligibility
+ORDER_CACHE_TTL = 30
+
+# Function schemas exposed to OpenAI (shared by every agent instance)
+_TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "lookup_order_by_id",
+            "description": "Look up a Shopify order by its order number or ID",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "order_id": {
+                        "type": "string",
+                        "description": "The Shopify order ID or order number (e.g., #1001)"
+                    }
+                },
+                "required": ["order_id"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "lookup_order_by_email",
+            "description": "Look up Shopify orders by customer email address",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "email": {
+                        "type": "string",
+                        "description": "The customer's email address"
+                    }
+                },
+                "required": ["email"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "check_return_eligibility",
+            "description": "Check if an item is eligible for return based on store policy",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "order_date": {
+                        "type": "string",
+                        "description": "The date the order was placed (ISO format)"
+                    },
+                    "item_id": {
+                        "type": "string",
+                        "description": "The ID of the item to be returned"
+                    },
+                    "return_reason": {
+                        "type": "string",
+                        "description": "The reason for the return",
+                        "enum": ["wrong_size", "defective", "not_as_described", "changed_mind", "damaged", "other"]
+                    }
+                },
+                "required": ["order_date", "item_id", "return_reason"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "process_refund",
+            "description": "Process a refund for an order item",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "order_id": {
+                        "type": "string",
+                        "description": "The Shopify order ID"
+                    },
+                    "line_item_id": {
+                        "type": "string",
+                        "description": "The ID of the line item to refund"
+                    },
+                    "quantity": {
+                        "type": "integer",
+                        "description": "The quantity to refund (optional, defaults to full quantity)"
+                    },
+                    "reason": {
+                        "type": "string",
+                        "description": "The reason for the refund",
+                        "default": "customer_request"
+                    }
+                },
+                "required": ["order_id", "line_item_id"]
+            }
+        }
+    }
+]
+
+
 class LLMReturnsChatAgent:
     """Enhanced returns chat agent powered by OpenAI with function calling."""
 
-    def __init__(self, config: Dict[str, str]):
+    def __init__(
+        self,
+        config: Dict[str, str],
+        logger: Optional[ConversationLogger] = None,
+        order_lookup: Optional[OrderLookup] = None,
+        refund_processor: Optional[RefundProcessor] = None,
+    ):
         """Initialize the LLM-powered returns chat agent.
         
         Args:
             config: Configuration dictionary with API keys and settings
+            logger: Conversation logger to use instead of the default
+                file-backed ConversationLogger (e.g. a test double)
+            order_lookup: Shared OrderLookup to use instead of one per
+                agent, so its pooled connections serve every conversation
+            refund_processor: Shared RefundProcessor, likewise
         """
         # Initialize OpenAI client
         project_id = config.get('OPENAI_PROJECT_ID')
@@ -44,116 +203,46 @@ class LLMReturnsChatAgent:
         self.client = OpenAI(**client_kwargs)
         self.model = config.get('OPENAI_MODEL', 'gpt-4o')
         
-        # Initialize tools
-        self.order_lookup = OrderLookup(
-            admin_token=config['SHOPIFY_ADMIN_TOKEN'],
-            store_domain=config['SHOPIFY_STORE_DOMAIN']
-        )
-        self.policy_checker = PolicyChecker()
-        self.refund_processor = RefundProcessor(
-            admin_token=config['SHOPIFY_ADMIN_TOKEN'],
-            store_domain=config['SHOPIFY_STORE_DOMAIN']
-        )
-        self.logger = ConversationLogger()
+        # Tools are created on first use (see the properties below)
+        self.config = config
+        if logger is not None:
+            self.logger = logger
+        if order_lookup is not None:
+            self.order_lookup = order_lookup
+        if refund_processor is not None:
+            self.refund_processor = refund_processor
         
-        # Conversation state
+        # Conversation state, guarded by _turn_lock while a message is processed
+        self._turn_lock = threading.Lock()
         self.conversation_id = None
         self.messages = []
         self.context = {}
         
-        # Define function schemas for OpenAI
-        self.tools = [
-            {
-                "type": "function",
-                "function": {
-                    "name": "lookup_order_by_id",
-                    "description": "Look up a Shopify order by its order number or ID",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "order_id": {
-                                "type": "string",
-                                "description": "The Shopify order ID or order number (e.g., #1001)"
-                            }
-                        },
-                        "required": ["order_id"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "lookup_order_by_email",
-                    "description": "Look up Shopify orders by customer email address",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "email": {
-                                "type": "string",
-                                "description": "The customer's email address"
-                            }
-                        },
-                        "required": ["email"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "check_return_eligibility",
-                    "description": "Check if an item is eligible for return based on store policy",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "order_date": {
-                                "type": "string",
-                                "description": "The date the order was placed (ISO format)"
-                            },
-                            "item_id": {
-                                "type": "string",
-                                "description": "The ID of the item to be returned"
-                            },
-                            "return_reason": {
-                                "type": "string",
-                                "description": "The reason for the return",
-                                "enum": ["wrong_size", "defective", "not_as_described", "changed_mind", "damaged", "other"]
-                            }
-                        },
-                        "required": ["order_date", "item_id", "return_reason"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "process_refund",
-                    "description": "Process a refund for an order item",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "order_id": {
-                                "type": "string",
-                                "description": "The Shopify order ID"
-                            },
-                            "line_item_id": {
-                                "type": "string",
-                                "description": "The ID of the line item to refund"
-                            },
-                            "quantity": {
-                                "type": "integer",
-                                "description": "The quantity to refund (optional, defaults to full quantity)"
-                            },
-                            "reason": {
-                                "type": "string",
-                                "description": "The reason for the refund",
-                                "default": "customer_request"
-                            }
-                        },
-                        "required": ["order_id", "line_item_id"]
-                    }
-                }
-            }
-        ]
+        # Function schemas for OpenAI
+        self.tools = _TOOLS
+
+    @cached_property
+    def order_lookup(self) -> OrderLookup:
+        return OrderLookup(
+            admin_token=self.config['SHOPIFY_ADMIN_TOKEN'],
+            store_domain=self.config['SHOPIFY_STORE_DOMAIN'],
+            cache_ttl=ORDER_CACHE_TTL
+        )
+
+    @cached_property
+    def policy_checker(self) -> PolicyChecker:
+        return PolicyChecker()
+
+    @cached_property
+    def refund_processor(self) -> RefundProcessor:
+        return RefundProcessor(
+            admin_token=self.config['SHOPIFY_ADMIN_TOKEN'],
+            store_domain=self.config['SHOPIFY_STORE_DOMAIN']
+        )
+
+    @cached_property
+    def logger(self) -> ConversationLogger:
+        return ConversationLogger()
 
     def start_conversation(self) -> str:
         """Start a new conversation with an AI-generated greeting."""
@@ -164,37 +253,7 @@ class LLMReturnsChatAgent:
         self.messages = [
             {
                 "role": "system", 
-                "content": """You are Maya, an AI returns assistant for an apparel e-commerce store. You're enthusiastic, empathetic, and genuinely want to help customers have a great experience.
-
-🎯 Your Personality:
-- Warm and conversational (like talking to a helpful friend)
-- Use emojis sparingly but effectively
-- Show empathy when customers are frustrated
-- Be proactive in offering solutions
-- Celebrate successful resolutions
-
-✨ Your Role:
-1. Help customers process returns and exchanges smoothly
-2. Look up order information when needed
-3. Check return eligibility with store policies
-4. Process approved refunds efficiently
-5. Turn potentially negative experiences into positive ones
-
-📋 Store Policies:
-- 30-day return window from order date
-- Items must be in original condition with tags
-- Free returns for defective items
-- Valid reasons: wrong size, defective, not as described, changed mind, damaged
-
-💬 Communication Style:
-- Use natural, conversational language
-- Ask clarifying questions to understand their needs
-- Provide clear next steps
-- Acknowledge their feelings ("I understand that's frustrating...")
-- Offer alternatives when possible
-- Keep responses concise but complete
-
-🚀 Always start by understanding what they need help with, then gather order information if needed."""
+                "content": _SYSTEM_PROMPT
             }
         ]
         
@@ -202,7 +261,7 @@ class LLMReturnsChatAgent:
         try:
             response = self.client.chat.completions.create(
                 model=self.model,
-                messages=self.messages + [{"role": "user", "content": "Hi there! I need help with something."}],
+                messages=self.messages + [{"role": "user", "content": _OPENING_USER_MESSAGE}],
                 max_tokens=200,
                 temperature=0.8
             )
@@ -210,13 +269,13 @@ class LLMReturnsChatAgent:
             greeting = response.choices[0].message.content
             
             # Add greeting to message history
-            self.messages.append({"role": "user", "content": "Hi there! I need help with something."})
+            self.messages.append({"role": "user", "content": _OPENING_USER_MESSAGE})
             self.messages.append({"role": "assistant", "content": greeting})
             
             # Log the interaction
             self.logger.log_interaction(
                 conversation_id=self.conversation_id,
-                user_msg="Hi there! I need help with something.",
+                user_msg=_OPENING_USER_MESSAGE,
                 agent_msg=greeting
             )
             
@@ -224,18 +283,14 @@ class LLMReturnsChatAgent:
             
         except Exception as e:
             # Enhanced fallback greeting if OpenAI fails
-            fallback_greeting = (
-                "Hi there! ✨ I'm Maya, your AI returns assistant. I'm here to make returns and exchanges super easy for you! "
-                "Whether you need to return something, check an order, or just have questions about our policies, I'm here to help. "
-                "What can I assist you with today?"
-            )
+            fallback_greeting = _FALLBACK_GREETING
             
-            self.messages.append({"role": "user", "content": "Hi there! I need help with something."})
+            self.messages.append({"role": "user", "content": _OPENING_USER_MESSAGE})
             self.messages.append({"role": "assistant", "content": fallback_greeting})
             
             self.logger.log_interaction(
                 conversation_id=self.conversation_id,
-                user_msg="Hi there! I need help with something.",
+                user_msg=_OPENING_USER_MESSAGE,
                 agent_msg=fallback_greeting,
                 metadata={"error": f"OpenAI API error: {str(e)}"}
             )
@@ -243,7 +298,16 @@ class LLMReturnsChatAgent:
             return fallback_greeting
 
     def process_message(self, user_message: str) -> str:
-        """Process user message using LLM with function calling."""
+        """Process user message using LLM with function calling.
+
+        Turns are serialized per agent: concurrent messages for the same
+        conversation would otherwise interleave their tool-call and tool
+        messages in the history sent to OpenAI.
+        """
+        with self._turn_lock:
+            return self._process_turn(user_message)
+
+    def _process_turn(self, user_message: str) -> str:
         try:
             # Log user message
             self.logger.log_interaction(
@@ -339,10 +403,7 @@ class LLMReturnsChatAgent:
                 return response_content
                 
         except Exception as e:
-            error_msg = (
-                "I apologize, but I'm experiencing some technical difficulties. "
-                "Please try again in a moment, or contact our customer service team directly."
-            )
+            error_msg = _ERROR_MESSAGE
             
             # Print the actual error for debugging
             print(f"DEBUG - LLM processing error: {str(e)}")
@@ -357,50 +418,71 @@ class LLMReturnsChatAgent:
             
             return error_msg
 
+    async def aprocess_message(self, user_message: str) -> str:
+        """Async variant of process_message.
+
+        Runs the blocking LLM/tool turn in a worker thread so the event loop
+        can keep serving other conversations while this one waits on I/O.
+        """
+        return await asyncio.to_thread(self.process_message, user_message)
+
     def _execute_function(self, function_name: str, args: Dict[str, Any]) -> Dict[str, Any]:
         """Execute the specified function with the given arguments."""
+        handler = self._FUNCTIONS.get(function_name)
+        if handler is None:
+            return {"error": f"Unknown function: {function_name}"}
         try:
-            if function_name == "lookup_order_by_id":
-                result = self.order_lookup.lookup_by_id(args["order_id"])
-                # Store order in context for future reference
-                if not result.get("error"):
-                    self.context['current_order'] = result
-                return result
-                
-            elif function_name == "lookup_order_by_email":
-                result = self.order_lookup.lookup_by_email(args["email"])
-                # Store orders in context for future reference
-                if isinstance(result, list) and result:
-                    self.context['available_orders'] = result
-                return result
-                
-            elif function_name == "check_return_eligibility":
-                result = self.policy_checker.check_eligibility(
-                    args["order_date"],
-                    args["item_id"],
-                    args["return_reason"]
-                )
-                # Store eligibility result in context
-                self.context['last_eligibility_check'] = result
-                return result
-                
-            elif function_name == "process_refund":
-                result = self.refund_processor.process_refund(
-                    order_id=args["order_id"],
-                    line_item_id=args["line_item_id"],
-                    quantity=args.get("quantity"),
-                    reason=args.get("reason", "customer_request")
-                )
-                # Store refund result in context
-                self.context['last_refund'] = result
-                return result
-                
-            else:
-                return {"error": f"Unknown function: {function_name}"}
-                
+            return handler(self, args)
         except Exception as e:
             return {"error": f"Function execution failed: {str(e)}"}
 
+    def _lookup_order_by_id(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        result = self.order_lookup.lookup_by_id(args["order_id"])
+        # Store order in context for future reference
+        if not result.get("error"):
+            self.context['current_order'] = result
+        return result
+
+    def _lookup_order_by_email(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        result = self.order_lookup.lookup_by_email(args["email"])
+        # Store orders in context for future reference
+        if isinstance(result, list) and result:
+            self.context['available_orders'] = result
+        return result
+
+    def _check_return_eligibility(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        # Decisions are shared read-only mappings; keep a plain copy, since
+        # it is stored in context and JSON-serialized for the model
+        result = dict(self.policy_checker.check_eligibility(
+            args["order_date"],
+            args["item_id"],
+            args["return_reason"]
+        ))
+        # Store eligibility result in context
+        self.context['last_eligibility_check'] = result
+        return result
+
+    def _process_refund(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        result = self.refund_processor.process_refund(
+            order_id=args["order_id"],
+            line_item_id=args["line_item_id"],
+            quantity=args.get("quantity"),
+            reason=args.get("reason", "customer_request")
+        )
+        # The order's refunds changed, so the next lookup must refetch it
+        self.order_lookup.invalidate(args["order_id"])
+        # Store refund result in context
+        self.context['last_refund'] = result
+        return result
+
+    # Function name (as declared in _TOOLS) -> handler, built once per class
+    _FUNCTIONS = {
+        "lookup_order_by_id": _lookup_order_by_id,
+        "lookup_order_by_email": _lookup_order_by_email,
+        "check_return_eligibility": _check_return_eligibility,
+        "process_refund": _process_refund,
+    }
+
     def get_conversation_summary(self) -> str:
         """Get a summary of the current conversation."""
         if not self.conversation_id:
@@ -445,9 +527,9 @@ class LLMReturnsChatAgent:
         self.context = state.get("context", {})
 
     @classmethod
-    def from_log(cls, config: dict, conversation_id: str):
+    def from_log(cls, config: dict, conversation_id: str, logger: Optional[ConversationLogger] = None):
         """Rebuild agent state from conversation logs."""
-        agent = cls(config)
+        agent = cls(config, logger=logger)
         agent.conversation_id = conversation_id
         # Retrieve conversation history from logger
         history = agent.logger.get_conversation_history(conversation_id)
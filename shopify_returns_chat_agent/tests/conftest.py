@@ -3,7 +3,8 @@
 import pytest
 import json
 import os
-from unittest.mock import MagicMock
+from types import SimpleNamespace
+from unittest.mock import create_autospec
 from pathlib import Path
 
 # Add parent directory to path for imports
@@ -11,6 +12,11 @@ import sys
 repo_root = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(repo_root))
 
+from tools.conversation_logger import ConversationLogger
+from tools.order_lookup import OrderLookup
+from tools.policy_checker import PolicyChecker
+from tools.refund_processor import RefundProcessor
+
 
 @pytest.fixture
 def mock_shopify_order():
@@ -61,7 +67,7 @@ def mock_shopify_order():
 @pytest.fixture
 def mock_order_lookup(mock_shopify_order):
     """Create a mocked OrderLookup instance."""
-    mock = MagicMock()
+    mock = create_autospec(OrderLookup, instance=True)
     
     # Setup mock responses
     mock.lookup_by_id.return_value = mock_shopify_order
@@ -73,7 +79,7 @@ def mock_order_lookup(mock_shopify_order):
 @pytest.fixture
 def mock_policy_checker():
     """Create a mocked PolicyChecker instance."""
-    mock = MagicMock()
+    mock = create_autospec(PolicyChecker, instance=True)
     
     # Default to approval
     mock.check_eligibility.return_value = {
@@ -87,7 +93,7 @@ def mock_policy_checker():
 @pytest.fixture
 def mock_refund_processor():
     """Create a mocked RefundProcessor instance."""
-    mock = MagicMock()
+    mock = create_autospec(RefundProcessor, instance=True)
     
     # Default to successful refund
     mock.process_refund.return_value = {
@@ -103,7 +109,7 @@ def mock_refund_processor():
 @pytest.fixture
 def mock_conversation_logger():
     """Create a mocked ConversationLogger instance."""
-    mock = MagicMock()
+    mock = create_autospec(ConversationLogger, instance=True)
     
     # Default responses
     mock.log_interaction.return_value = None
@@ -117,6 +123,25 @@ def mock_conversation_logger():
     return mock
 
 
+@pytest.fixture
+def null_logger():
+    """No-op conversation logger for agents under test that never read logs back."""
+    return SimpleNamespace(
+        log_interaction=lambda **kwargs: True,
+        summarize_conversation=lambda conversation_id: {
+            "conversation_id": conversation_id,
+            "messages": {"total_interactions": 0},
+        },
+        get_conversation_history=lambda conversation_id: [],
+    )
+
+
+@pytest.fixture
+def real_logger(tmp_path):
+    """File-backed ConversationLogger writing under a per-test temp dir."""
+    return ConversationLogger(log_dir=tmp_path)
+
+
 @pytest.fixture
 def test_config():
     """Test configuration for chat agent."""
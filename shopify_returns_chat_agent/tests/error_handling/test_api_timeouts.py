@@ -32,13 +32,14 @@ class TestAPITimeouts(unittest.TestCase):
             'SHOPIFY_STORE_DOMAIN': 'test-store.myshopify.com'
         }
         
-        # Create mock objects for dependencies
-        with patch('llm_returns_chat_agent.OrderLookup'), \
-             patch('llm_returns_chat_agent.PolicyChecker'), \
-             patch('llm_returns_chat_agent.RefundProcessor'), \
-             patch('llm_returns_chat_agent.ConversationLogger'), \
-             patch('llm_returns_chat_agent.OpenAI'):
-            
+        # Create mock objects for dependencies. The agent builds its tools
+        # on first use, so keep those patched for the whole test.
+        for tool in ('OrderLookup', 'PolicyChecker', 'RefundProcessor', 'ConversationLogger'):
+            patcher = patch(f'llm_returns_chat_agent.{tool}')
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        with patch('llm_returns_chat_agent.OpenAI'):
             self.agent = LLMReturnsChatAgent(self.test_config)
 
     @patch('llm_returns_chat_agent.OpenAI')
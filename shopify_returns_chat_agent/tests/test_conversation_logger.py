@@ -2,7 +2,9 @@ import pytest
 import json
 import tempfile
 import shutil
+import sqlite3
 from pathlib import Path
+from unittest.mock import patch
 import sys
 
 # Adjust import path
@@ -143,6 +145,34 @@ class TestConversationLogger:
         for conv_id in conv_ids:
             assert conv_id in conversations
 
+    def test_index_rebuilt_from_existing_logs(self):
+        """Test that a missing summary index is rebuilt from the JSONL logs."""
+        self.logger.log_interaction(self.conversation_id, user_msg="Hello")
+        self.logger.log_interaction(self.conversation_id, agent_msg="Hi there!")
+        self.logger.close_conversation(self.conversation_id)
+        for path in Path(self.temp_dir).glob("index.db*"):
+            path.unlink()
+
+        logger = ConversationLogger(log_dir=self.temp_dir)
+        assert logger.list_conversations() == [self.conversation_id]
+        summary = logger.summarize_conversation(self.conversation_id)
+        assert summary["messages"]["user"] == 1
+        assert summary["messages"]["agent"] == 1
+        assert summary["messages"]["total_interactions"] == 2
+
+    def test_index_failure_keeps_logged_entry(self):
+        """Test that an index write error does not report a logged entry as lost."""
+        error = sqlite3.OperationalError("database is locked")
+        with patch.object(self.logger, "_index_entry", side_effect=error):
+            assert self.logger.log_interaction(self.conversation_id, user_msg="Hello") is True
+
+        history = self.logger.get_conversation_history(self.conversation_id)
+        assert [entry["user_message"] for entry in history] == ["Hello"]
+
+    def test_index_uses_normal_synchronous_mode(self):
+        """Test that the WAL index does not fsync on every commit."""
+        assert self.logger._index.execute("PRAGMA synchronous").fetchone()[0] == 1
+
     def test_delete_conversation_existing(self):
         """Test deleting an existing conversation."""
         # Create conversation
@@ -201,6 +231,33 @@ class TestConversationLogger:
             assert history[i]["user_message"] == f"Message {i}"
             assert history[i]["agent_message"] == f"Response {i}"
 
+    def test_unflushed_entries_visible_to_history(self):
+        """Test that flush=False entries are still returned by history reads."""
+        for i in range(3):
+            assert self.logger.log_interaction(
+                self.conversation_id, user_msg=f"Message {i}", flush=False
+            ) is True
+
+        history = self.logger.get_conversation_history(self.conversation_id)
+        assert [entry["user_message"] for entry in history] == [
+            "Message 0", "Message 1", "Message 2"
+        ]
+
+        # Closing the handle keeps the data and later writes reopen the file
+        self.logger.close_conversation(self.conversation_id)
+        self.logger.log_interaction(self.conversation_id, user_msg="Message 3")
+        assert len(self.logger.get_conversation_history(self.conversation_id)) == 4
+
+    def test_iter_conversation_history_streams_entries(self):
+        """Test that history can be consumed lazily, entry by entry."""
+        for i in range(3):
+            self.logger.log_interaction(self.conversation_id, user_msg=f"Message {i}")
+
+        entries = self.logger.iter_conversation_history(self.conversation_id)
+        assert next(entries)["user_message"] == "Message 0"
+        assert [entry["user_message"] for entry in entries] == ["Message 1", "Message 2"]
+        assert list(self.logger.iter_conversation_history("nonexistent_conversation")) == []
+
     def test_unicode_handling(self):
         """Test handling of unicode characters in messages."""
         unicode_msg = "Hello 👋 World! 🌍 Testing émojis and accénts"
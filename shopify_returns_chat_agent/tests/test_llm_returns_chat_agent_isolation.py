@@ -5,23 +5,35 @@ These tests verify the agent's functionality in isolation using mocked dependenc
 No external API calls are made during testing.
 """
 
-import unittest
+import asyncio
 import json
+import threading
+import time
 import uuid
-from unittest.mock import MagicMock, patch, Mock
+from collections import deque
+from unittest.mock import MagicMock, patch, Mock, call
 import sys
 import os
 
+import pytest
+from openai import OpenAI
+
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from llm_returns_chat_agent import LLMReturnsChatAgent
+from tools.conversation_logger import ConversationLogger
+from tools.order_lookup import OrderLookup
+from tools.policy_checker import PolicyChecker
+from tools.refund_processor import RefundProcessor
+
+TEST_CONVERSATION_ID = str(uuid.UUID(int=1))
 
 
-class TestLLMReturnsChatAgentIsolation(unittest.TestCase):
+class TestLLMReturnsChatAgentIsolation:
     """Test suite for LLM Returns Chat Agent in isolation."""
 
-    def setUp(self):
+    def setup_method(self):
         """Set up test fixtures with mocked dependencies."""
         self.test_config = {
             'OPENAI_API_KEY': 'test_api_key',
@@ -90,24 +102,26 @@ class TestLLMReturnsChatAgentIsolation(unittest.TestCase):
         self.mock_patches = []
         
         # Mock OpenAI client
-        self.mock_openai_client = MagicMock()
+        self.mock_openai_client = MagicMock(spec=OpenAI)
+        # Pre-wire the chat completions path used by the agent
+        self.mock_create = self.mock_openai_client.chat.completions.create
         openai_patch = patch('llm_returns_chat_agent.OpenAI', return_value=self.mock_openai_client)
         self.mock_patches.append(openai_patch)
         
         # Mock tools
-        self.mock_order_lookup = MagicMock()
+        self.mock_order_lookup = MagicMock(spec=OrderLookup)
         order_lookup_patch = patch('llm_returns_chat_agent.OrderLookup', return_value=self.mock_order_lookup)
         self.mock_patches.append(order_lookup_patch)
         
-        self.mock_policy_checker = MagicMock()
+        self.mock_policy_checker = MagicMock(spec=PolicyChecker)
         policy_patch = patch('llm_returns_chat_agent.PolicyChecker', return_value=self.mock_policy_checker)
         self.mock_patches.append(policy_patch)
         
-        self.mock_refund_processor = MagicMock()
+        self.mock_refund_processor = MagicMock(spec=RefundProcessor)
         refund_patch = patch('llm_returns_chat_agent.RefundProcessor', return_value=self.mock_refund_processor)
         self.mock_patches.append(refund_patch)
         
-        self.mock_conversation_logger = MagicMock()
+        self.mock_conversation_logger = MagicMock(spec=ConversationLogger)
         logger_patch = patch('llm_returns_chat_agent.ConversationLogger', return_value=self.mock_conversation_logger)
         self.mock_patches.append(logger_patch)
         
@@ -118,18 +132,25 @@ class TestLLMReturnsChatAgentIsolation(unittest.TestCase):
         # Initialize agent with mocked dependencies
         self.agent = LLMReturnsChatAgent(self.test_config)
 
-    def tearDown(self):
+    def teardown_method(self):
         """Clean up patches after each test."""
         for patch_obj in self.mock_patches:
             patch_obj.stop()
 
+    def queue_responses(self, *responses):
+        """Queue OpenAI responses; each create() call pops the next one."""
+        pending = deque(responses)
+        self.mock_create.side_effect = (
+            lambda *args, **kwargs: pending.popleft()
+        )
+
     def test_initialization(self):
         """Test agent initialization with valid configuration."""
-        self.assertEqual(self.agent.model, 'gpt-4o')
-        self.assertIsNone(self.agent.conversation_id)
-        self.assertEqual(self.agent.messages, [])
-        self.assertEqual(self.agent.context, {})
-        self.assertEqual(len(self.agent.tools), 4)
+        assert self.agent.model == 'gpt-4o'
+        assert self.agent.conversation_id is None
+        assert self.agent.messages == []
+        assert self.agent.context == {}
+        assert len(self.agent.tools) == 4
         
         # Verify OpenAI client was initialized with correct parameters
         self.mock_openai_client.assert_called_once()
@@ -137,32 +158,70 @@ class TestLLMReturnsChatAgentIsolation(unittest.TestCase):
     def test_start_conversation(self):
         """Test starting a new conversation."""
         # Mock OpenAI response
-        self.mock_openai_client.chat.completions.create.return_value = self.sample_greeting_response
+        self.mock_create.return_value = self.sample_greeting_response
         
         greeting = self.agent.start_conversation()
         
         # Verify conversation was initialized
-        self.assertIsNotNone(self.agent.conversation_id)
-        self.assertEqual(len(self.agent.messages), 3)  # System, user, assistant
-        self.assertEqual(self.agent.messages[0]['role'], 'system')
-        self.assertEqual(self.agent.messages[1]['role'], 'user')
-        self.assertEqual(self.agent.messages[2]['role'], 'assistant')
+        assert self.agent.conversation_id is not None
+        assert len(self.agent.messages) == 3  # System, user, assistant
+        assert self.agent.messages[0]['role'] == 'system'
+        assert self.agent.messages[1]['role'] == 'user'
+        assert self.agent.messages[2]['role'] == 'assistant'
         
         # Verify OpenAI was called
-        self.mock_openai_client.chat.completions.create.assert_called_once()
+        self.mock_create.assert_called_once()
         
         # Verify conversation was logged
         self.mock_conversation_logger.log_interaction.assert_called_once()
 
+    def test_injected_logger_replaces_default(self, null_logger):
+        """Test that a logger passed to the agent is used instead of the default."""
+        agent = LLMReturnsChatAgent(self.test_config, logger=null_logger)
+        self.mock_create.return_value = self.sample_greeting_response
+
+        agent.start_conversation()
+
+        assert agent.logger is null_logger
+        self.mock_conversation_logger.log_interaction.assert_not_called()
+
+    def test_injected_order_lookup_shared_across_agents(self):
+        """Test that agents given one OrderLookup all send lookups through it."""
+        shared_lookup = MagicMock(spec=OrderLookup)
+        shared_lookup.lookup_by_id.return_value = self.sample_order
+        agents = [LLMReturnsChatAgent(self.test_config, order_lookup=shared_lookup) for _ in range(2)]
+
+        for agent in agents:
+            agent._execute_function('lookup_order_by_id', {'order_id': '1001'})
+
+        assert all(agent.order_lookup is shared_lookup for agent in agents)
+        assert shared_lookup.lookup_by_id.call_count == 2
+        self.mock_order_lookup.lookup_by_id.assert_not_called()
+
+    def test_injected_refund_processor_replaces_default(self):
+        """Test that a shared RefundProcessor is used instead of one per agent."""
+        shared_processor = MagicMock(spec=RefundProcessor)
+        agent = LLMReturnsChatAgent(self.test_config, refund_processor=shared_processor)
+
+        assert agent.refund_processor is shared_processor
+
+    def test_conversation_logged_to_real_logger(self, real_logger):
+        """Test that interactions round-trip through a file-backed logger."""
+        agent = LLMReturnsChatAgent(self.test_config, logger=real_logger)
+        self.mock_create.return_value = self.sample_greeting_response
+
+        greeting = agent.start_conversation()
+
+        history = real_logger.get_conversation_history(agent.conversation_id)
+        assert len(history) == 1
+        assert history[0]["agent_message"] == greeting
+
     def test_process_message_with_function_call(self):
         """Test processing a message that triggers a function call."""
         # Setup conversation
-        self.agent.conversation_id = str(uuid.uuid4())
+        self.agent.conversation_id = TEST_CONVERSATION_ID
         self.agent.messages = [{'role': 'system', 'content': 'test'}]
         
-        # Mock OpenAI function call response
-        self.mock_openai_client.chat.completions.create.return_value = self.sample_function_call_response
-        
         # Mock order lookup tool
         self.mock_order_lookup.lookup_by_id.return_value = self.sample_order
         
@@ -174,21 +233,18 @@ class TestLLMReturnsChatAgentIsolation(unittest.TestCase):
                 }
             }]
         }
-        self.mock_openai_client.chat.completions.create.side_effect = [
-            self.sample_function_call_response,
-            follow_up_response
-        ]
+        self.queue_responses(self.sample_function_call_response, follow_up_response)
         
         response = self.agent.process_message("I want to return order #1001")
         
         # Verify function was called
-        self.mock_order_lookup.lookup_by_id.assert_called_once_with('1001')
+        assert self.mock_order_lookup.lookup_by_id.call_args_list[0] == call('1001')
         
         # Verify OpenAI was called twice (initial + follow-up)
-        self.assertEqual(self.mock_openai_client.chat.completions.create.call_count, 2)
+        assert self.mock_create.call_count == 2
         
         # Verify conversation was logged
-        self.mock_conversation_logger.log_interaction.assert_called()
+        assert self.mock_conversation_logger.log_interaction.call_count
 
     def test_execute_function_lookup_order_by_id(self):
         """Test executing the lookup_order_by_id function."""
@@ -197,7 +253,7 @@ class TestLLMReturnsChatAgentIsolation(unittest.TestCase):
         result = self.agent._execute_function('lookup_order_by_id', {'order_id': '1001'})
         
         self.mock_order_lookup.lookup_by_id.assert_called_once_with('1001')
-        self.assertEqual(result, self.sample_order)
+        assert result == self.sample_order
 
     def test_execute_function_lookup_order_by_email(self):
         """Test executing the lookup_order_by_email function."""
@@ -207,7 +263,7 @@ class TestLLMReturnsChatAgentIsolation(unittest.TestCase):
         result = self.agent._execute_function('lookup_order_by_email', {'email': 'customer@example.com'})
         
         self.mock_order_lookup.lookup_by_email.assert_called_once_with('customer@example.com')
-        self.assertEqual(result, orders_response)
+        assert result == orders_response
 
     def test_execute_function_check_return_eligibility(self):
         """Test executing the check_return_eligibility function."""
@@ -224,7 +280,7 @@ class TestLLMReturnsChatAgentIsolation(unittest.TestCase):
         })
         
         self.mock_policy_checker.check_eligibility.assert_called_once()
-        self.assertEqual(result, eligibility_response)
+        assert result == eligibility_response
 
     def test_execute_function_process_refund(self):
         """Test executing the process_refund function."""
@@ -243,26 +299,26 @@ class TestLLMReturnsChatAgentIsolation(unittest.TestCase):
         })
         
         self.mock_refund_processor.process_refund.assert_called_once()
-        self.assertEqual(result, refund_response)
+        assert result == refund_response
 
     def test_execute_function_invalid_function_name(self):
         """Test executing an invalid function name."""
         result = self.agent._execute_function('invalid_function', {})
         
-        self.assertIn('error', result)
-        self.assertIn('Unknown function', result['error'])
+        assert 'error' in result
+        assert 'Unknown function' in result['error']
 
     def test_conversation_state_management(self):
         """Test that conversation state is properly managed."""
         # Start conversation
-        self.mock_openai_client.chat.completions.create.return_value = self.sample_greeting_response
+        self.mock_create.return_value = self.sample_greeting_response
         self.agent.start_conversation()
         
         initial_conversation_id = self.agent.conversation_id
         initial_message_count = len(self.agent.messages)
         
         # Process a message
-        self.mock_openai_client.chat.completions.create.return_value = {
+        self.mock_create.return_value = {
             'choices': [{
                 'message': {
                     'content': 'Thank you for your message!'
@@ -273,13 +329,13 @@ class TestLLMReturnsChatAgentIsolation(unittest.TestCase):
         self.agent.process_message("Test message")
         
         # Verify state is maintained
-        self.assertEqual(self.agent.conversation_id, initial_conversation_id)
-        self.assertEqual(len(self.agent.messages), initial_message_count + 2)  # user + assistant
+        assert self.agent.conversation_id == initial_conversation_id
+        assert len(self.agent.messages) == initial_message_count + 2  # user + assistant
 
     def test_get_conversation_summary(self):
         """Test getting conversation summary."""
         # Setup conversation
-        self.agent.conversation_id = str(uuid.uuid4())
+        self.agent.conversation_id = TEST_CONVERSATION_ID
         self.agent.messages = [
             {'role': 'system', 'content': 'System prompt'},
             {'role': 'user', 'content': 'I want to return my order'},
@@ -294,12 +350,12 @@ class TestLLMReturnsChatAgentIsolation(unittest.TestCase):
                 }
             }]
         }
-        self.mock_openai_client.chat.completions.create.return_value = summary_response
+        self.mock_create.return_value = summary_response
         
         summary = self.agent.get_conversation_summary()
         
-        self.assertEqual(summary, 'Customer initiated return request')
-        self.mock_openai_client.chat.completions.create.assert_called_once()
+        assert summary == 'Customer initiated return request'
+        self.mock_create.assert_called_once()
 
     def test_get_conversation_history(self):
         """Test getting conversation history."""
@@ -311,9 +367,9 @@ class TestLLMReturnsChatAgentIsolation(unittest.TestCase):
         
         history = self.agent.get_conversation_history()
         
-        self.assertEqual(len(history), 2)
-        self.assertEqual(history[0]['role'], 'user')
-        self.assertEqual(history[1]['role'], 'assistant')
+        assert len(history) == 2
+        assert history[0]['role'] == 'user'
+        assert history[1]['role'] == 'assistant'
 
     def test_get_and_set_state(self):
         """Test getting and setting agent state."""
@@ -325,9 +381,9 @@ class TestLLMReturnsChatAgentIsolation(unittest.TestCase):
         # Get state
         state = self.agent.get_state()
         
-        self.assertEqual(state['conversation_id'], 'test_id')
-        self.assertEqual(state['context'], {'test': 'value'})
-        self.assertEqual(len(state['messages']), 1)
+        assert state['conversation_id'] == 'test_id'
+        assert state['context'] == {'test': 'value'}
+        assert len(state['messages']) == 1
         
         # Set new state
         new_state = {
@@ -338,22 +394,53 @@ class TestLLMReturnsChatAgentIsolation(unittest.TestCase):
         
         self.agent.set_state(new_state)
         
-        self.assertEqual(self.agent.conversation_id, 'new_id')
-        self.assertEqual(self.agent.context, {'new': 'context'})
-        self.assertEqual(len(self.agent.messages), 1)
+        assert self.agent.conversation_id == 'new_id'
+        assert self.agent.context == {'new': 'context'}
+        assert len(self.agent.messages) == 1
+
+    def test_concurrent_messages_are_serialized(self):
+        """Test that overlapping turns for one agent run one at a time."""
+        self.agent.conversation_id = TEST_CONVERSATION_ID
+        active, overlaps = [0], []
+        lock = threading.Lock()
+
+        def slow_create(*args, **kwargs):
+            with lock:
+                active[0] += 1
+                overlaps.append(active[0] > 1)
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            response = MagicMock()
+            response.choices[0].message.tool_calls = None
+            response.choices[0].message.content = "ok"
+            return response
+
+        self.mock_create.side_effect = slow_create
+
+        async def _run():
+            return await asyncio.gather(
+                self.agent.aprocess_message("first"),
+                self.agent.aprocess_message("second"),
+            )
+
+        assert asyncio.run(_run()) == ["ok", "ok"]
+        assert overlaps == [False, False]
+        roles = [message["role"] for message in self.agent.messages]
+        assert roles == ["user", "assistant", "user", "assistant"]
 
     def test_error_handling_openai_failure(self):
         """Test error handling when OpenAI API fails."""
         # Mock OpenAI failure
-        self.mock_openai_client.chat.completions.create.side_effect = Exception("OpenAI API Error")
+        self.mock_create.side_effect = Exception("OpenAI API Error")
         
-        with self.assertRaises(Exception):
+        with pytest.raises(Exception):
             self.agent.start_conversation()
 
     def test_error_handling_tool_failure(self):
         """Test error handling when a tool fails."""
         # Setup conversation
-        self.agent.conversation_id = str(uuid.uuid4())
+        self.agent.conversation_id = TEST_CONVERSATION_ID
         self.agent.messages = [{'role': 'system', 'content': 'test'}]
         
         # Mock tool failure
@@ -361,12 +448,12 @@ class TestLLMReturnsChatAgentIsolation(unittest.TestCase):
         
         result = self.agent._execute_function('lookup_order_by_id', {'order_id': '1001'})
         
-        self.assertIn('error', result)
-        self.assertIn('Tool Error', result['error'])
+        assert 'error' in result
+        assert 'Tool Error' in result['error']
 
     def test_tool_function_schemas(self):
         """Test that tool function schemas are properly defined."""
-        self.assertEqual(len(self.agent.tools), 4)
+        assert len(self.agent.tools) == 4
         
         tool_names = [tool['function']['name'] for tool in self.agent.tools]
         expected_names = [
@@ -377,14 +464,10 @@ class TestLLMReturnsChatAgentIsolation(unittest.TestCase):
         ]
         
         for name in expected_names:
-            self.assertIn(name, tool_names)
+            assert name in tool_names
             
         # Verify each tool has required parameters
         for tool in self.agent.tools:
-            self.assertIn('parameters', tool['function'])
-            self.assertIn('properties', tool['function']['parameters'])
-            self.assertIn('required', tool['function']['parameters'])
-
-
-if __name__ == '__main__':
-    unittest.main() 
\ No newline at end of file
+            assert 'parameters' in tool['function']
+            assert 'properties' in tool['function']['parameters']
+            assert 'required' in tool['function']['parameters'] 
@@ -1,8 +1,11 @@
+import asyncio
 import json
 from pathlib import Path
 from unittest.mock import patch
 
+import httpx
 import pytest
+import requests
 
 # Adjust import path when running tests directly
 import sys, os
@@ -24,30 +27,45 @@ def _mock_response(status_code=200, json_data=None):
         def json(self):
             return self._json
 
+        @property
+        def content(self):
+            return json.dumps(self._json).encode()
+
         def raise_for_status(self):
             if not (200 <= self.status_code < 300):
-                raise Exception("HTTP error")
+                raise requests.HTTPError("HTTP error", response=self)
 
     return _Resp()
 
 
-def test_lookup_by_id_found():
+@pytest.fixture(autouse=True)
+def _reset_persisted_queries():
+    """Persisted-query state is shared per endpoint; start each test clean."""
+    OrderLookup._persisted_hashes.clear()
+    OrderLookup._apq_unsupported.clear()
+
+
+@pytest.fixture
+def order_lookup():
+    # Function-scoped: instances also cache orders when cache_ttl is set
+    return OrderLookup(ADMIN_TOKEN, STORE_DOMAIN)
+
+
+def test_lookup_by_id_found(order_lookup):
     order_json = {"data": {"order": {"id": "123", "name": "#1001"}}}
-    with patch("requests.post", return_value=_mock_response(json_data=order_json)) as _:
-        ol = OrderLookup(ADMIN_TOKEN, STORE_DOMAIN)
-        result = ol.lookup_by_id("123")
+    with patch("requests.Session.post", return_value=_mock_response(json_data=order_json)) as _:
+        result = order_lookup.lookup_by_id("123")
         assert result["id"] == "123"
 
 
-def test_lookup_by_id_not_found():
+def test_lookup_by_id_not_found(order_lookup):
     order_json = {"data": {"order": None}}
-    with patch("requests.post", return_value=_mock_response(json_data=order_json)):
-        ol = OrderLookup(ADMIN_TOKEN, STORE_DOMAIN)
-        result = ol.lookup_by_id("999")
+    with patch("requests.Session.post", return_value=_mock_response(json_data=order_json)):
+        result = order_lookup.lookup_by_id("999")
         assert result["error"] == "not_found"
 
 
-def test_lookup_by_email_found():
+def test_lookup_by_email_found(order_lookup):
     orders_json = {
         "data": {
             "orders": {
@@ -58,15 +76,164 @@ def test_lookup_by_email_found():
             }
         }
     }
-    with patch("requests.post", return_value=_mock_response(json_data=orders_json)):
-        ol = OrderLookup(ADMIN_TOKEN, STORE_DOMAIN)
-        results = ol.lookup_by_email("test@example.com")
+    with patch("requests.Session.post", return_value=_mock_response(json_data=orders_json)):
+        results = order_lookup.lookup_by_email("test@example.com")
         assert len(results) == 2
 
 
-def test_lookup_by_email_not_found():
+def test_lookup_by_email_not_found(order_lookup):
     orders_json = {"data": {"orders": {"edges": []}}}
-    with patch("requests.post", return_value=_mock_response(json_data=orders_json)):
-        ol = OrderLookup(ADMIN_TOKEN, STORE_DOMAIN)
-        result = ol.lookup_by_email("no@example.com")
-        assert result["error"] == "not_found" 
\ No newline at end of file
+    with patch("requests.Session.post", return_value=_mock_response(json_data=orders_json)):
+        result = order_lookup.lookup_by_email("no@example.com")
+        assert result["error"] == "not_found" 
+
+
+def test_alookup_many(order_lookup):
+    responses = [
+        httpx.Response(200, json={"data": {"order": {"id": "123", "name": "#1001"}}}),
+        httpx.Response(200, json={"data": {"order": None}}),
+    ]
+    for response in responses:
+        response.request = httpx.Request("POST", order_lookup.base_url)
+
+    async def _run():
+        with patch("httpx.AsyncClient.post", side_effect=responses):
+            try:
+                return await order_lookup.alookup_many(["123", "999"])
+            finally:
+                await order_lookup.aclose()
+
+    found, missing = asyncio.run(_run())
+    assert found["id"] == "123"
+    assert missing["error"] == "not_found"
+
+
+def test_persisted_query_sent_as_hash_after_first_call():
+    ol = OrderLookup(ADMIN_TOKEN, STORE_DOMAIN)
+    order_json = {"data": {"order": {"id": "123", "name": "#1001"}}}
+    with patch("requests.Session.post", return_value=_mock_response(json_data=order_json)) as mock_post:
+        ol.lookup_by_id("123")
+        ol.lookup_by_id("123")
+
+    first, second = (c.kwargs["json"] for c in mock_post.call_args_list)
+    assert "query" in first
+    assert "query" not in second
+    assert second["extensions"]["persistedQuery"]["sha256Hash"]
+
+
+def test_persisted_query_unsupported_falls_back_to_full_query():
+    ol = OrderLookup(ADMIN_TOKEN, STORE_DOMAIN)
+    order_json = {"data": {"order": {"id": "123", "name": "#1001"}}}
+    rejected = {"errors": [{"message": "PersistedQueryNotSupported"}]}
+    responses = [
+        _mock_response(json_data=order_json),
+        _mock_response(json_data=rejected),
+        _mock_response(json_data=order_json),
+        _mock_response(json_data=order_json),
+    ]
+    with patch("requests.Session.post", side_effect=responses) as mock_post:
+        ol.lookup_by_id("123")
+        assert ol.lookup_by_id("123")["id"] == "123"
+        ol.lookup_by_id("123")
+
+    payloads = [c.kwargs["json"] for c in mock_post.call_args_list]
+    assert "query" not in payloads[1]
+    assert "query" in payloads[2]
+    assert "extensions" not in payloads[3]
+
+
+def test_persisted_query_rejected_with_http_error_falls_back_to_full_query():
+    ol = OrderLookup(ADMIN_TOKEN, STORE_DOMAIN)
+    order_json = {"data": {"order": {"id": "123", "name": "#1001"}}}
+    rejected = _mock_response(
+        status_code=400, json_data={"errors": {"query": "Required parameter missing or invalid"}}
+    )
+    responses = [
+        _mock_response(json_data=order_json),
+        rejected,
+        _mock_response(json_data=order_json),
+        _mock_response(json_data=order_json),
+    ]
+    with patch("requests.Session.post", side_effect=responses) as mock_post:
+        ol.lookup_by_id("123")
+        assert ol.lookup_by_id("123")["id"] == "123"
+        # Another instance for the same store skips persisted queries too
+        assert OrderLookup(ADMIN_TOKEN, STORE_DOMAIN).lookup_by_id("123")["id"] == "123"
+
+    payloads = [c.kwargs["json"] for c in mock_post.call_args_list]
+    assert "query" not in payloads[1]
+    assert "query" in payloads[2]
+    assert "extensions" not in payloads[3]
+
+
+def test_persisted_query_timeout_is_not_resent():
+    ol = OrderLookup(ADMIN_TOKEN, STORE_DOMAIN)
+    order_json = {"data": {"order": {"id": "123", "name": "#1001"}}}
+    responses = [
+        _mock_response(json_data=order_json),
+        requests.Timeout("read timed out"),
+        _mock_response(json_data=order_json),
+    ]
+    with patch("requests.Session.post", side_effect=responses) as mock_post:
+        ol.lookup_by_id("123")
+        assert ol.lookup_by_id("123") == {"error": "not_found"}
+        assert mock_post.call_count == 2
+        # Persisted queries stay enabled for the endpoint
+        assert ol.lookup_by_id("123")["id"] == "123"
+
+    payloads = [c.kwargs["json"] for c in mock_post.call_args_list]
+    assert "query" not in payloads[2]
+    assert OrderLookup._apq_unsupported == set()
+
+
+def test_persisted_query_throttled_is_not_resent():
+    ol = OrderLookup(ADMIN_TOKEN, STORE_DOMAIN)
+    order_json = {"data": {"order": {"id": "123", "name": "#1001"}}}
+    throttled = {"errors": [{"message": "Throttled", "extensions": {"code": "THROTTLED"}}]}
+    responses = [_mock_response(json_data=order_json), _mock_response(json_data=throttled)]
+    with patch("requests.Session.post", side_effect=responses) as mock_post:
+        ol.lookup_by_id("123")
+        ol.lookup_by_id("123")
+
+    assert mock_post.call_count == 2
+    assert OrderLookup._apq_unsupported == set()
+
+
+def test_persisted_queries_shared_across_instances():
+    order_json = {"data": {"order": {"id": "123", "name": "#1001"}}}
+    with patch("requests.Session.post", return_value=_mock_response(json_data=order_json)) as mock_post:
+        OrderLookup(ADMIN_TOKEN, STORE_DOMAIN).lookup_by_id("123")
+        OrderLookup(ADMIN_TOKEN, STORE_DOMAIN).lookup_by_id("123")
+
+    assert "query" not in mock_post.call_args_list[1].kwargs["json"]
+
+
+def test_cached_order_reused_until_invalidated():
+    ol = OrderLookup(ADMIN_TOKEN, STORE_DOMAIN, cache_ttl=60)
+    order_json = {"data": {"order": {"id": "123", "name": "#1001"}}}
+    with patch("requests.Session.post", return_value=_mock_response(json_data=order_json)) as mock_post:
+        assert ol.lookup_by_id("123")["id"] == "123"
+        assert ol.lookup_by_id("123")["id"] == "123"
+        assert mock_post.call_count == 1
+
+        ol.invalidate("123")
+        ol.lookup_by_id("123")
+        assert mock_post.call_count == 2
+
+
+def test_invalidate_accepts_order_gid():
+    ol = OrderLookup(ADMIN_TOKEN, STORE_DOMAIN, cache_ttl=60)
+    order_json = {"data": {"order": {"id": "gid://shopify/Order/1001", "name": "#1001"}}}
+    with patch("requests.Session.post", return_value=_mock_response(json_data=order_json)) as mock_post:
+        ol.lookup_by_id("1001")
+        ol.invalidate("gid://shopify/Order/1001")
+        ol.lookup_by_id("1001")
+    assert mock_post.call_count == 2
+
+
+def test_not_found_orders_are_not_cached():
+    ol = OrderLookup(ADMIN_TOKEN, STORE_DOMAIN, cache_ttl=60)
+    with patch("requests.Session.post", return_value=_mock_response(json_data={"data": {"order": None}})) as mock_post:
+        ol.lookup_by_id("999")
+        ol.lookup_by_id("999")
+    assert mock_post.call_count == 2
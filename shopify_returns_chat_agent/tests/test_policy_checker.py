@@ -9,20 +9,34 @@ sys.path.insert(0, str(repo_root))
 
 from tools.policy_checker import PolicyChecker
 
+# Frozen "current" time so return-window math is deterministic
+NOW = datetime(2024, 6, 1, 12, 0, 0)
+RECENT_DATE = (NOW - timedelta(days=5)).isoformat() + "Z"
+OLD_DATE = (NOW - timedelta(days=35)).isoformat() + "Z"
+NEAR_EXPIRY_DATE = (NOW - timedelta(days=27)).isoformat() + "Z"
+
+
+class _FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return NOW.replace(tzinfo=tz)
+
+
+@pytest.fixture(autouse=True)
+def _freeze_time(monkeypatch):
+    monkeypatch.setattr("tools.policy_checker.datetime", _FrozenDatetime)
+
 
 class TestPolicyChecker:
     
     def setup_method(self):
         """Set up test fixtures."""
         self.pc = PolicyChecker()
-        self.recent_date = (datetime.now() - timedelta(days=5)).isoformat() + "Z"
-        self.old_date = (datetime.now() - timedelta(days=35)).isoformat() + "Z"
-        self.near_expiry_date = (datetime.now() - timedelta(days=27)).isoformat() + "Z"
 
     def test_approve_valid_return(self):
         """Test approval of valid return within window."""
         result = self.pc.check_eligibility(
-            self.recent_date, "item_123", "wrong_size"
+            RECENT_DATE, "item_123", "wrong_size"
         )
         assert result["decision"] == "approve"
         assert "meets all policy requirements" in result["reason"]
@@ -30,7 +44,7 @@ class TestPolicyChecker:
     def test_auto_approve_defective(self):
         """Test auto-approval for defective items."""
         result = self.pc.check_eligibility(
-            self.recent_date, "item_123", "defective"
+            RECENT_DATE, "item_123", "defective"
         )
         assert result["decision"] == "approve"
         assert "automatically approved" in result["reason"]
@@ -38,7 +52,7 @@ class TestPolicyChecker:
     def test_deny_expired_return(self):
         """Test denial of return outside window."""
         result = self.pc.check_eligibility(
-            self.old_date, "item_123", "wrong_size"
+            OLD_DATE, "item_123", "wrong_size"
         )
         assert result["decision"] == "deny"
         assert "Return window" in result["reason"]
@@ -47,7 +61,7 @@ class TestPolicyChecker:
     def test_deny_invalid_reason(self):
         """Test denial for invalid return reason."""
         result = self.pc.check_eligibility(
-            self.recent_date, "item_123", "invalid_reason"
+            RECENT_DATE, "item_123", "invalid_reason"
         )
         assert result["decision"] == "deny"
         assert "Invalid return reason" in result["reason"]
@@ -57,7 +71,7 @@ class TestPolicyChecker:
         # Update policy to exclude an item
         self.pc.update_policy({"excluded_items": ["excluded_item"]})
         result = self.pc.check_eligibility(
-            self.recent_date, "excluded_item", "wrong_size"
+            RECENT_DATE, "excluded_item", "wrong_size"
         )
         assert result["decision"] == "deny"
         assert "not eligible for returns" in result["reason"]
@@ -65,11 +79,21 @@ class TestPolicyChecker:
     def test_flag_near_expiry(self):
         """Test flagging for returns near expiry."""
         result = self.pc.check_eligibility(
-            self.near_expiry_date, "item_123", "wrong_size"
+            NEAR_EXPIRY_DATE, "item_123", "wrong_size"
         )
         assert result["decision"] == "flag"
         assert "near the end" in result["reason"]
 
+    def test_window_boundary_uses_whole_days(self):
+        """Test that a partial day past the window is still within it."""
+        last_day = (NOW - timedelta(days=30, hours=12)).isoformat() + "Z"
+        result = self.pc.check_eligibility(last_day, "item_123", "wrong_size")
+        assert result["decision"] == "flag"
+
+        day_after = (NOW - timedelta(days=31)).isoformat() + "Z"
+        result = self.pc.check_eligibility(day_after, "item_123", "wrong_size")
+        assert result["decision"] == "deny"
+
     def test_deny_missing_information(self):
         """Test denial when required info is missing."""
         result = self.pc.check_eligibility("", "item_123", "wrong_size")
@@ -84,6 +108,17 @@ class TestPolicyChecker:
         assert result["decision"] == "deny"
         assert "Invalid order date format" in result["reason"]
 
+    def test_decisions_are_shared_read_only(self):
+        """Test that repeat checks reuse one read-only decision."""
+        first = self.pc.check_eligibility(RECENT_DATE, "item_123", "defective")
+        second = self.pc.check_eligibility(RECENT_DATE, "item_123", "defective")
+        assert first is second
+        assert self.pc.check_eligibility("", "item_123", "wrong_size") is self.pc.check_eligibility(
+            "", "item_456", "defective"
+        )
+        with pytest.raises(TypeError):
+            first["decision"] = "deny"
+
     def test_custom_policies(self):
         """Test with custom store policies."""
         custom_policies = {
@@ -95,11 +130,30 @@ class TestPolicyChecker:
         pc_custom = PolicyChecker(custom_policies)
         
         # Test custom window
-        old_date = (datetime.now() - timedelta(days=20)).isoformat() + "Z"
+        old_date = (NOW - timedelta(days=20)).isoformat() + "Z"
         result = pc_custom.check_eligibility(old_date, "item_123", "defective")
         assert result["decision"] == "deny"
         assert "14 days" in result["reason"]
 
+    def test_check_many_matches_check_eligibility(self):
+        """Test that batch decisions agree with single-return checks."""
+        self.pc.update_policy({"excluded_items": ["excluded_item"]})
+        rows = [
+            (RECENT_DATE, "item_123", "wrong_size"),
+            (RECENT_DATE, "item_123", "defective"),
+            (OLD_DATE, "item_123", "defective"),
+            (NEAR_EXPIRY_DATE, "item_123", "wrong_size"),
+            (NEAR_EXPIRY_DATE, "item_123", "defective"),
+            (RECENT_DATE, "item_123", "invalid_reason"),
+            (RECENT_DATE, "excluded_item", "defective"),
+            ("invalid-date", "item_123", "wrong_size"),
+            ("", "item_123", "wrong_size"),
+        ]
+
+        decisions = self.pc.check_many(*zip(*rows))
+
+        assert decisions == [self.pc.check_eligibility(*row)["decision"] for row in rows]
+
     def test_get_policy_summary(self):
         """Test policy summary retrieval."""
         summary = self.pc.get_policy_summary()
@@ -110,4 +164,13 @@ class TestPolicyChecker:
         """Test policy updates."""
         self.pc.update_policy({"return_window_days": 45})
         summary = self.pc.get_policy_summary()
-        assert summary["return_window_days"] == 45 
\ No newline at end of file
+        assert summary["return_window_days"] == 45
+
+    def test_update_policy_invalidates_cached_decisions(self):
+        """Cached decisions must not outlive the policy they were made under."""
+        result = self.pc.check_eligibility(RECENT_DATE, "cached_item", "wrong_size")
+        assert result["decision"] == "approve"
+
+        self.pc.update_policy({"excluded_items": ["cached_item"]})
+        result = self.pc.check_eligibility(RECENT_DATE, "cached_item", "wrong_size")
+        assert result["decision"] == "deny"
@@ -1,3 +1,6 @@
+import asyncio
+import httpx
+import json
 import pytest
 from unittest.mock import patch
 from pathlib import Path
@@ -22,6 +25,10 @@ def _mock_response(status_code=200, json_data=None):
         def json(self):
             return self._json
 
+        @property
+        def content(self):
+            return json.dumps(self._json).encode()
+
         def raise_for_status(self):
             if not (200 <= self.status_code < 300):
                 raise Exception("HTTP error")
@@ -29,138 +36,170 @@ def _mock_response(status_code=200, json_data=None):
     return _Resp()
 
 
-class TestRefundProcessor:
-
-    def setup_method(self):
-        """Set up test fixtures."""
-        self.rp = RefundProcessor(ADMIN_TOKEN, STORE_DOMAIN)
-
-    def test_successful_line_item_refund(self):
-        """Test successful refund of a line item."""
-        response_data = {
-            "data": {
-                "refundCreate": {
-                    "refund": {
-                        "id": "gid://shopify/Refund/123",
-                        "createdAt": "2024-01-01T10:00:00Z"
-                    },
-                    "userErrors": []
-                }
-            }
-        }
-        
-        with patch("requests.post", return_value=_mock_response(json_data=response_data)):
-            result = self.rp.process_refund("123456", line_item_id="item_123")
-            assert result["success"] is True
-            assert "gid://shopify/Refund/123" in result["refund_id"]
-
-    def test_successful_line_item_refund_with_quantity(self):
-        """Test successful refund of a line item with specific quantity."""
-        response_data = {
-            "data": {
-                "refundCreate": {
-                    "refund": {
-                        "id": "gid://shopify/Refund/124",
-                        "createdAt": "2024-01-01T10:00:00Z"
-                    },
-                    "userErrors": []
-                }
-            }
-        }
-        
-        with patch("requests.post", return_value=_mock_response(json_data=response_data)) as mock_post:
-            result = self.rp.process_refund("123456", line_item_id="item_123", quantity=3)
-            assert result["success"] is True
-            assert "gid://shopify/Refund/124" in result["refund_id"]
-            
-            # Verify that the quantity was passed in the GraphQL variables
-            call_args = mock_post.call_args
-            posted_data = call_args[1]['json']
-            assert posted_data['variables']['quantity'] == 3
-
-    def test_successful_amount_refund(self):
-        """Test successful refund of a specific amount."""
-        response_data = {
-            "data": {
-                "refundCreate": {
-                    "refund": {
-                        "id": "gid://shopify/Refund/456",
-                        "createdAt": "2024-01-01T10:00:00Z"
-                    },
-                    "userErrors": []
-                }
-            }
-        }
-        
-        with patch("requests.post", return_value=_mock_response(json_data=response_data)):
-            result = self.rp.process_refund("123456", amount=50.00)
-            assert result["success"] is True
-            assert "gid://shopify/Refund/456" in result["refund_id"]
-
-    def test_user_error_handling(self):
-        """Test handling of Shopify user errors."""
-        response_data = {
-            "data": {
-                "refundCreate": {
-                    "refund": None,
-                    "userErrors": [
-                        {
-                            "field": "orderId",
-                            "message": "Order not found"
-                        }
-                    ]
-                }
+def _make_refund_response(refund_id):
+    return {
+        "data": {
+            "refundCreate": {
+                "refund": {
+                    "id": f"gid://shopify/Refund/{refund_id}",
+                    "createdAt": "2024-01-01T10:00:00Z"
+                },
+                "userErrors": []
             }
         }
-        
-        with patch("requests.post", return_value=_mock_response(json_data=response_data)):
-            result = self.rp.process_refund("999999", line_item_id="item_123")
-            assert "error" in result
-            assert "Order not found" in result["error"]
+    }
+
+
+@pytest.fixture(scope="session")
+def refund_processor():
+    return RefundProcessor(ADMIN_TOKEN, STORE_DOMAIN)
 
-    def test_graphql_error_handling(self):
-        """Test handling of GraphQL errors."""
-        response_data = {
-            "errors": [
+
+_USER_ERROR_RESPONSE = {
+    "data": {
+        "refundCreate": {
+            "refund": None,
+            "userErrors": [
                 {
-                    "message": "Invalid query syntax"
+                    "field": "orderId",
+                    "message": "Order not found"
                 }
             ]
         }
-        
-        with patch("requests.post", return_value=_mock_response(json_data=response_data)):
-            result = self.rp.process_refund("123456", line_item_id="item_123")
-            assert "error" in result
-            assert "Invalid query syntax" in result["error"]
+    }
+}
+
+_UNKNOWN_ERROR_RESPONSE = {
+    "data": {
+        "refundCreate": {
+            "refund": None,
+            "userErrors": []
+        }
+    }
+}
+
+
+class TestRefundProcessor:
 
-    def test_missing_parameters(self):
+    @pytest.mark.parametrize(
+        "kwargs,refund_id,check",
+        [
+            ({"line_item_id": "item_123"}, "123", None),
+            (
+                {"line_item_id": "item_123", "quantity": 3},
+                "124",
+                lambda payload: payload["variables"]["quantity"] == 3,
+            ),
+            ({"amount": 50.00}, "456", None),
+        ],
+        ids=["line_item", "line_item_with_quantity", "amount"],
+    )
+    def test_successful_refund(self, refund_processor, kwargs, refund_id, check):
+        """Test successful refunds by line item, line item quantity and amount."""
+        response_data = _make_refund_response(refund_id)
+
+        with patch("requests.Session.post", return_value=_mock_response(json_data=response_data)) as mock_post:
+            result = refund_processor.process_refund("123456", **kwargs)
+            assert result["success"] is True
+            assert f"gid://shopify/Refund/{refund_id}" in result["refund_id"]
+
+            if check:
+                # Verify the GraphQL variables that were posted
+                assert check(json.loads(mock_post.call_args[1]["data"]))
+
+    @pytest.mark.parametrize(
+        "side_effect_kind,payload,expect",
+        [
+            ("exception", Exception("Network error"), "api_error"),
+            ("response", {"errors": [{"message": "Invalid query syntax"}]}, "Invalid query syntax"),
+            ("response", _USER_ERROR_RESPONSE, "Order not found"),
+            ("response", _UNKNOWN_ERROR_RESPONSE, "Unknown error occurred"),
+        ],
+        ids=["network_error", "graphql_error", "user_error", "unknown_error"],
+    )
+    def test_error_handling(self, refund_processor, side_effect_kind, payload, expect):
+        """Test handling of network, GraphQL, user and unexpected-structure errors."""
+        if side_effect_kind == "exception":
+            patch_kwargs = {"side_effect": payload}
+        else:
+            patch_kwargs = {"return_value": _mock_response(json_data=payload)}
+
+        with patch("requests.Session.post", **patch_kwargs):
+            result = refund_processor.process_refund("123456", line_item_id="item_123")
+            assert "error" in result
+            assert expect in result["error"]
+
+    def test_aprocess_many(self, refund_processor):
+        """Test concurrent async refunds, including one rejected by validation."""
+        response = httpx.Response(200, json=_make_refund_response("789"))
+        response.request = httpx.Request("POST", refund_processor.base_url)
+
+        async def _run():
+            with patch("httpx.AsyncClient.post", return_value=response) as mock_post:
+                try:
+                    results = await refund_processor.aprocess_many([
+                        {"order_id": "123456", "line_item_id": "item_123"},
+                        {"order_id": "123456"},
+                    ])
+                finally:
+                    await refund_processor.aclose()
+            return results, mock_post.call_count
+
+        (refunded, invalid), post_count = asyncio.run(_run())
+        assert refunded["success"] is True
+        assert "Either line_item_id or amount" in invalid["error"]
+        assert post_count == 1
+
+    def test_process_refunds_bulk(self, refund_processor):
+        """Test bulk refunds are split into batches of aliased mutations."""
+        refunds = [{"order_id": str(1000 + i), "line_item_id": "item_123"} for i in range(26)]
+        refunds.insert(1, {"order_id": "1001"})
+        first_batch = {"data": {
+            f"r{i}": _make_refund_response(i)["data"]["refundCreate"] for i in range(25)
+        }}
+        first_batch["data"]["r3"] = _USER_ERROR_RESPONSE["data"]["refundCreate"]
+        first_batch["data"]["r5"] = first_batch["data"]["r6"] = None
+        first_batch["errors"] = [
+            {"message": f"Access denied for r{i}", "path": [f"r{i}"]} for i in (5, 6)
+        ]
+        second_batch = {"data": {"r0": _make_refund_response(25)["data"]["refundCreate"]}}
+        responses = [_mock_response(json_data=first_batch), _mock_response(json_data=second_batch)]
+
+        with patch("requests.Session.post", side_effect=responses) as mock_post:
+            results = refund_processor.process_refunds_bulk(refunds)
+
+        assert mock_post.call_count == 2
+        first_payload = json.loads(mock_post.call_args_list[0].kwargs["data"])
+        assert first_payload["query"].count("refundCreate(") == 25
+        assert first_payload["variables"]["orderId0"] == "gid://shopify/Order/1000"
+        assert len(results) == 27
+        assert "Either line_item_id or amount" in results[1]["error"]
+        assert results[4]["error"] == "Order not found"
+        assert results[6]["error"] == "Access denied for r5"
+        assert results[7]["error"] == "Access denied for r6"
+        assert results[-1]["refund_id"] == "gid://shopify/Refund/25"
+
+    def test_missing_parameters(self, refund_processor):
         """Test validation of required parameters."""
         # Missing order_id
-        result = self.rp.process_refund("", line_item_id="item_123")
+        result = refund_processor.process_refund("", line_item_id="item_123")
         assert "error" in result
         assert "order_id is required" in result["error"]
         
         # Missing both line_item_id and amount
-        result = self.rp.process_refund("123456")
+        result = refund_processor.process_refund("123456")
         assert "error" in result
         assert "Either line_item_id or amount must be specified" in result["error"]
 
-    def test_id_formatting(self):
+    def test_id_formatting(self, refund_processor):
         """Test proper formatting of IDs for GraphQL."""
         # Test that numeric IDs get converted to GIDs
-        assert self.rp._format_order_id("123456") == "gid://shopify/Order/123456"
-        assert self.rp._format_line_item_id("item_123") == "gid://shopify/LineItem/item_123"
+        assert refund_processor._format_order_id("123456") == "gid://shopify/Order/123456"
+        assert refund_processor._format_line_item_id("item_123") == "gid://shopify/LineItem/item_123"
         
         # Test that existing GIDs are preserved
         existing_gid = "gid://shopify/Order/123456"
-        assert self.rp._format_order_id(existing_gid) == existing_gid
-
-    def test_network_error_handling(self):
-        """Test handling of network errors."""
-        with patch("requests.post", side_effect=Exception("Network error")):
-            result = self.rp.process_refund("123456", line_item_id="item_123")
-            assert "error" in result
-            assert "api_error" in result["error"]
+        assert refund_processor._format_order_id(existing_gid) == existing_gid
 
     def test_initialization_validation(self):
         """Test validation during initialization."""
@@ -169,19 +208,3 @@ class TestRefundProcessor:
         
         with pytest.raises(ValueError):
             RefundProcessor(ADMIN_TOKEN, "")
-
-    def test_unknown_error_handling(self):
-        """Test handling when refund creation returns unexpected structure."""
-        response_data = {
-            "data": {
-                "refundCreate": {
-                    "refund": None,
-                    "userErrors": []
-                }
-            }
-        }
-        
-        with patch("requests.post", return_value=_mock_response(json_data=response_data)):
-            result = self.rp.process_refund("123456", line_item_id="item_123")
-            assert "error" in result
-            assert "Unknown error occurred" in result["error"] 
\ No newline at end of file
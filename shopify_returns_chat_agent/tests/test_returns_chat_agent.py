@@ -10,26 +10,42 @@ sys.path.insert(0, str(repo_root))
 from returns_chat_agent import ReturnsChatAgent
 
 
+@pytest.fixture(scope="module")
+def tool_patches(_order_lookup_spec, _policy_checker_spec, _refund_processor_spec, _conversation_logger_spec):
+    """Patch the agent's tool classes once for the whole module.
+
+    Each class returns the session's autospec'd instance, which the
+    function-scoped mock_* fixtures reset before every test.
+    """
+    patchers = [
+        patch("returns_chat_agent.OrderLookup", return_value=_order_lookup_spec),
+        patch("returns_chat_agent.PolicyChecker", return_value=_policy_checker_spec),
+        patch("returns_chat_agent.RefundProcessor", return_value=_refund_processor_spec),
+        patch("returns_chat_agent.ConversationLogger", return_value=_conversation_logger_spec),
+    ]
+    for p in patchers:
+        p.start()
+    yield
+    for p in patchers:
+        p.stop()
+
+
 class TestReturnsChatAgent:
 
-    def setup_method(self):
+    @pytest.fixture(autouse=True)
+    def _setup(self, tool_patches, mock_order_lookup, mock_policy_checker,
+               mock_refund_processor, mock_conversation_logger):
         """Set up test fixtures."""
         self.config = {
             'SHOPIFY_ADMIN_TOKEN': 'test_token',
             'SHOPIFY_STORE_DOMAIN': 'test-store.myshopify.com'
         }
-        
-        # Mock all tools to isolate agent logic
-        with patch('returns_chat_agent.OrderLookup') as mock_order_lookup, \
-             patch('returns_chat_agent.PolicyChecker') as mock_policy_checker, \
-             patch('returns_chat_agent.RefundProcessor') as mock_refund_processor, \
-             patch('returns_chat_agent.ConversationLogger') as mock_logger:
-            
-            self.agent = ReturnsChatAgent(self.config)
-            self.mock_order_lookup = mock_order_lookup.return_value
-            self.mock_policy_checker = mock_policy_checker.return_value
-            self.mock_refund_processor = mock_refund_processor.return_value
-            self.mock_logger = mock_logger.return_value
+
+        self.agent = ReturnsChatAgent(self.config)
+        self.mock_order_lookup = mock_order_lookup
+        self.mock_policy_checker = mock_policy_checker
+        self.mock_refund_processor = mock_refund_processor
+        self.mock_logger = mock_conversation_logger
 
     def test_initialization_valid_config(self):
         """Test successful initialization with valid config."""
@@ -0,0 +1,81 @@
+"""Numeric core of PolicyChecker decisions for batch eligibility sweeps.
+
+Decisions are encoded as small ints and return reasons as their index in the
+policy's valid_reasons list, so a whole batch can be scored without touching
+Python dicts. When numba is installed the kernels are JIT-compiled (and the
+batch loop parallelised); otherwise the same functions run as plain Python.
+"""
+
+from typing import List, Sequence
+
+DENY = -1
+FLAG = 0
+APPROVE = 1
+
+# Reason code for reasons not in the policy's valid_reasons
+INVALID_REASON = 255
+# Reason codes index bits of a uint64 auto-approve mask
+MAX_REASONS = 64
+
+try:
+    import numpy as np
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
+
+@njit(cache=True, boundscheck=False)
+def score(days, reason_code, item_excluded, window_days, near_days, auto_mask):
+    """Score one return; mirrors the rule order of PolicyChecker.check_eligibility."""
+    if item_excluded:
+        return DENY
+    if reason_code == INVALID_REASON:
+        return DENY
+    if days > window_days:
+        return DENY
+    if (auto_mask >> reason_code) & 1:
+        return APPROVE
+    if days > near_days:
+        return FLAG
+    return APPROVE
+
+
+if HAVE_NUMBA:
+    @njit(cache=True, parallel=True, boundscheck=False)
+    def _score_into(days, reason_codes, item_excluded, window_days, near_days, auto_mask, out):
+        for i in prange(days.shape[0]):
+            out[i] = score(days[i], reason_codes[i], item_excluded[i], window_days, near_days, auto_mask)
+
+
+def score_many(
+    days: Sequence[int],
+    reason_codes: Sequence[int],
+    item_excluded: Sequence[int],
+    window_days: int,
+    near_days: int,
+    auto_mask: int,
+) -> List[int]:
+    """Score a batch of returns, returning one decision code per row."""
+    if HAVE_NUMBA:
+        out = np.empty(len(days), dtype=np.int8)
+        _score_into(
+            np.asarray(days, dtype=np.int64),
+            np.asarray(reason_codes, dtype=np.uint8),
+            np.asarray(item_excluded, dtype=np.uint8),
+            window_days,
+            near_days,
+            np.uint64(auto_mask),
+            out,
+        )
+        return out.tolist()
+
+    return [
+        score(d, code, excluded, window_days, near_days, auto_mask)
+        for d, code, excluded in zip(days, reason_codes, item_excluded)
+    ]
@@ -8,20 +8,77 @@ Example:
     logger.log_interaction("conv_123", user_msg="Hi", agent_msg="Hello!")
 """
 
-import json
+import logging
 import os
+import sqlite3
+import threading
+import weakref
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Union
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# ciso8601 is optional: a C parser for the ISO timestamps we write
+try:
+    from ciso8601 import parse_datetime as _parse_timestamp
+except ImportError:
+    _parse_timestamp = datetime.fromisoformat
+
+
+_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    conversation_id TEXT PRIMARY KEY,
+    user_messages INTEGER NOT NULL,
+    agent_messages INTEGER NOT NULL,
+    tool_calls INTEGER NOT NULL,
+    total_interactions INTEGER NOT NULL,
+    start_time TEXT,
+    end_time TEXT
+)
+"""
+
+_INDEX_UPSERT = """
+INSERT INTO conversations VALUES (?, ?, ?, ?, 1, ?, ?)
+ON CONFLICT(conversation_id) DO UPDATE SET
+    user_messages = user_messages + excluded.user_messages,
+    agent_messages = agent_messages + excluded.agent_messages,
+    tool_calls = tool_calls + excluded.tool_calls,
+    total_interactions = total_interactions + 1,
+    end_time = excluded.end_time
+"""
+
+
+def _close_handles(handles: "OrderedDict[str, BinaryIO]", index: sqlite3.Connection) -> None:
+    """Flush and close every cached log file handle and the index database."""
+    while handles:
+        _, handle = handles.popitem()
+        try:
+            handle.close()
+        except Exception:
+            pass
+    index.close()
 
 
 class ConversationLogger:
     """Log and retrieve conversation interactions for audit trails."""
 
+    # Upper bound on simultaneously open conversation files
+    MAX_OPEN_HANDLES = 64
+
     def __init__(self, log_dir: str = "logs"):
         """Initialize logger with specified log directory."""
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(exist_ok=True)
+        # Append handles kept open per conversation (least recently used first)
+        self._handles: "OrderedDict[str, BinaryIO]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._index = self._open_index()
+        # Close handles when the logger is collected or the interpreter exits
+        self._finalizer = weakref.finalize(self, _close_handles, self._handles, self._index)
 
     def log_interaction(
         self,
@@ -29,7 +86,8 @@ class ConversationLogger:
         user_msg: Optional[str] = None,
         agent_msg: Optional[str] = None,
         tool_calls: Optional[List[Dict[str, Any]]] = None,
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        flush: bool = True
     ) -> bool:
         """Log a single interaction in the conversation.
         
@@ -39,6 +97,8 @@ class ConversationLogger:
             agent_msg: Agent's response (optional)
             tool_calls: List of tool calls made during this interaction
             metadata: Additional metadata (timestamps, IDs, etc.)
+            flush: Flush the entry to disk immediately (pass False to let
+                the OS batch writes; reads through this logger still flush)
             
         Returns:
             True if logged successfully, False otherwise
@@ -59,14 +119,7 @@ class ConversationLogger:
             "metadata": metadata or {}
         }
 
-        # Write to log file (JSONL format)
-        log_file = self.log_dir / f"{conversation_id}.jsonl"
-        try:
-            with open(log_file, "a", encoding="utf-8") as f:
-                f.write(json.dumps(log_entry, ensure_ascii=False) + "\n")
-            return True
-        except Exception:
-            return False
+        return self._write_entry(log_entry, flush)
 
     def get_conversation_history(self, conversation_id: str) -> List[Dict[str, Any]]:
         """Retrieve the full history of a conversation.
@@ -77,22 +130,34 @@ class ConversationLogger:
         Returns:
             List of log entries, or empty list if conversation not found
         """
-        log_file = self.log_dir / f"{conversation_id}.jsonl"
-        
-        if not log_file.exists():
-            return []
-
-        history = []
         try:
-            with open(log_file, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if line:
-                        history.append(json.loads(line))
+            return list(self.iter_conversation_history(conversation_id))
         except Exception:
             return []
 
-        return history
+    def iter_conversation_history(self, conversation_id: str) -> Iterator[Dict[str, Any]]:
+        """Yield a conversation's log entries one at a time.
+
+        Streams the log file instead of loading it whole, so callers that
+        only need a few entries (e.g. via itertools.islice) stay O(1) in memory.
+
+        Args:
+            conversation_id: Unique identifier for the conversation
+
+        Yields:
+            Parsed log entries in the order they were written
+        """
+        log_file = self.log_dir / f"{conversation_id}.jsonl"
+        self._flush(conversation_id)
+
+        if not log_file.exists():
+            return
+
+        with open(log_file, "rb") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield orjson.loads(line)
 
     def summarize_conversation(self, conversation_id: str) -> Dict[str, Any]:
         """Generate a summary of the conversation.
@@ -103,26 +168,28 @@ class ConversationLogger:
         Returns:
             Summary dict with message counts, duration, etc.
         """
-        history = self.get_conversation_history(conversation_id)
+        # Counts and time range come from the per-conversation index row
+        try:
+            with self._lock:
+                row = self._index.execute(
+                    "SELECT user_messages, agent_messages, tool_calls, total_interactions,"
+                    " start_time, end_time FROM conversations WHERE conversation_id = ?",
+                    (conversation_id,),
+                ).fetchone()
+        except sqlite3.Error:
+            row = None
 
-        if not history:
+        if row is None:
             return {"error": "Conversation not found"}
 
-        # Count different types of interactions
-        user_messages = sum(1 for entry in history if entry.get("user_message"))
-        agent_messages = sum(1 for entry in history if entry.get("agent_message"))
-        tool_calls_count = sum(len(entry.get("tool_calls", [])) for entry in history)
-
-        # Get start and end times
-        start_time = history[0]["timestamp"] if history else None
-        end_time = history[-1]["timestamp"] if history else None
+        user_messages, agent_messages, tool_calls_count, total, start_time, end_time = row
 
         # Calculate duration if both timestamps exist
         duration_seconds = None
         if start_time and end_time:
             try:
-                start_dt = datetime.fromisoformat(start_time)
-                end_dt = datetime.fromisoformat(end_time)
+                start_dt = _parse_timestamp(start_time)
+                end_dt = _parse_timestamp(end_time)
                 duration_seconds = (end_dt - start_dt).total_seconds()
             except ValueError:
                 pass
@@ -132,7 +199,7 @@ class ConversationLogger:
             "messages": {
                 "user": user_messages,
                 "agent": agent_messages,
-                "total_interactions": len(history)
+                "total_interactions": total
             },
             "tool_calls": tool_calls_count,
             "duration": {
@@ -149,8 +216,9 @@ class ConversationLogger:
             List of conversation IDs
         """
         try:
-            conversation_files = self.log_dir.glob("*.jsonl")
-            return [f.stem for f in conversation_files]
+            with self._lock:
+                rows = self._index.execute("SELECT conversation_id FROM conversations").fetchall()
+            return [row[0] for row in rows]
         except Exception:
             return []
 
@@ -164,7 +232,12 @@ class ConversationLogger:
             True if deleted successfully, False otherwise
         """
         log_file = self.log_dir / f"{conversation_id}.jsonl"
+        self.close_conversation(conversation_id)
         try:
+            with self._lock:
+                self._index.execute(
+                    "DELETE FROM conversations WHERE conversation_id = ?", (conversation_id,)
+                )
             if log_file.exists():
                 log_file.unlink()
                 return True
@@ -192,15 +265,130 @@ class ConversationLogger:
         Returns:
             True if logged successfully, False otherwise
         """
-        tool_call = {
-            "tool_name": tool_name,
-            "input": tool_input,
-            "output": tool_output,
-            "timestamp": datetime.now().isoformat()
+        if not conversation_id:
+            return False
+
+        # Build the entry directly; the tool call shares the entry timestamp
+        timestamp = datetime.now().isoformat()
+        log_entry = {
+            "conversation_id": conversation_id,
+            "timestamp": timestamp,
+            "user_message": None,
+            "agent_message": None,
+            "tool_calls": [{
+                "tool_name": tool_name,
+                "input": tool_input,
+                "output": tool_output,
+                "timestamp": timestamp
+            }],
+            "metadata": metadata or {}
         }
 
-        return self.log_interaction(
-            conversation_id=conversation_id,
-            tool_calls=[tool_call],
-            metadata=metadata
-        ) 
\ No newline at end of file
+        return self._write_entry(log_entry)
+
+    def close_conversation(self, conversation_id: str) -> None:
+        """Flush and close the cached file handle for a conversation."""
+        with self._lock:
+            handle = self._handles.pop(conversation_id, None)
+        if handle is not None:
+            try:
+                handle.close()
+            except Exception:
+                pass
+
+    def _write_entry(self, log_entry: Dict[str, Any], flush: bool = True) -> bool:
+        """Append an entry to its conversation log (JSONL) and the index."""
+        try:
+            with self._lock:
+                handle = self._get_handle(log_entry["conversation_id"])
+                handle.write(orjson.dumps(log_entry) + b"\n")
+                if flush:
+                    handle.flush()
+                try:
+                    self._index_entry(log_entry)
+                except sqlite3.Error as exc:
+                    # The entry is already in the audit log; only the
+                    # summary totals miss it (e.g. "database is locked")
+                    logger.error("ConversationLogger index update failed: %s", exc)
+            return True
+        except Exception:
+            return False
+
+    def _get_handle(self, conversation_id: str) -> BinaryIO:
+        """Return the append handle for a conversation; caller holds the lock."""
+        handle = self._handles.get(conversation_id)
+        if handle is not None:
+            self._handles.move_to_end(conversation_id)
+            return handle
+
+        if len(self._handles) >= self.MAX_OPEN_HANDLES:
+            _, oldest = self._handles.popitem(last=False)
+            oldest.close()
+
+        handle = open(self.log_dir / f"{conversation_id}.jsonl", "ab")
+        self._handles[conversation_id] = handle
+        return handle
+
+    def _flush(self, conversation_id: str) -> None:
+        """Push any buffered entries for a conversation to disk."""
+        with self._lock:
+            handle = self._handles.get(conversation_id)
+            if handle is not None:
+                handle.flush()
+
+    def _open_index(self) -> sqlite3.Connection:
+        """Open the SQLite summary index, rebuilding it from the logs if new.
+
+        The JSONL files remain the audit record; the index keeps one row of
+        running totals per conversation so summaries and listings do not
+        rescan log files.
+        """
+        index = sqlite3.connect(
+            self.log_dir / "index.db", isolation_level=None, check_same_thread=False
+        )
+        index.execute("PRAGMA journal_mode=WAL")
+        # WAL only needs to sync at checkpoints; FULL would fsync every write
+        index.execute("PRAGMA synchronous=NORMAL")
+        is_new = index.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'conversations'"
+        ).fetchone() is None
+        index.execute(_INDEX_SCHEMA)
+
+        if is_new:
+            self._index = index
+            index.execute("BEGIN")
+            for conversation_id in self._scan_log_ids():
+                try:
+                    for entry in self.iter_conversation_history(conversation_id):
+                        self._index_entry(entry)
+                except Exception:
+                    continue
+            index.execute("COMMIT")
+        return index
+
+    def _scan_log_ids(self) -> List[str]:
+        """Return conversation IDs of the log files on disk.
+
+        os.scandir reuses the directory listing's file type, avoiding a
+        stat() and a Path object per entry that glob would cost.
+        """
+        with os.scandir(self.log_dir) as entries:
+            return [
+                entry.name[:-6]
+                for entry in entries
+                if entry.name.endswith(".jsonl") and entry.is_file(follow_symlinks=False)
+            ]
+
+    def _index_entry(self, entry: Dict[str, Any]) -> None:
+        """Add one log entry to its conversation's running totals."""
+        self._index.execute(
+            _INDEX_UPSERT,
+            (
+                entry["conversation_id"],
+                1 if entry.get("user_message") else 0,
+                1 if entry.get("agent_message") else 0,
+                len(entry.get("tool_calls", [])),
+                entry["timestamp"],
+                entry["timestamp"],
+            ),
+        )
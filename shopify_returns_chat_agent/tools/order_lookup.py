@@ -11,9 +11,19 @@ Example:
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import logging
+import threading
+import time
+import httpx
+import orjson
 import requests
-from typing import Any, Dict, List
+from collections import OrderedDict
+from requests.adapters import HTTPAdapter
+from typing import Any, Dict, List, Tuple
+from urllib3.util.retry import Retry
+
 
 logger = logging.getLogger(__name__)
 
@@ -22,8 +32,25 @@ class OrderLookup:
     """Lookup Shopify orders by ID or customer email."""
 
     API_VERSION = "2023-10"
+    MAX_CACHED_ORDERS = 1024
+
+    # Automatic persisted queries, tracked per API endpoint and shared by
+    # all instances (the agent creates one OrderLookup per conversation):
+    # hashes each server has stored, and servers that reject hash-only
+    # requests.
+    _persisted_hashes: Dict[str, set[str]] = {}
+    _apq_unsupported: set[str] = set()
 
-    def __init__(self, admin_token: str, store_domain: str):
+    def __init__(self, admin_token: str, store_domain: str, cache_ttl: float = 0):
+        """Create a lookup client.
+
+        Args:
+            admin_token: Shopify Admin API access token
+            store_domain: Shop domain, e.g. "example.myshopify.com"
+            cache_ttl: Seconds to reuse an order fetched by ID (0 disables
+                caching). Lookups are GraphQL POSTs, which HTTP caches and
+                ETags do not cover, so repeats are short-circuited here.
+        """
         if not admin_token or not store_domain:
             raise ValueError("admin_token and store_domain are required")
         self.admin_token = admin_token
@@ -33,6 +60,24 @@ class OrderLookup:
             "Content-Type": "application/json",
             "X-Shopify-Access-Token": self.admin_token,
         }
+        # Reuse one keep-alive connection across lookups; urllib3 retries
+        # throttled (429) and transient 5xx responses. Queries are read-only,
+        # so retrying the POST is safe.
+        retry = Retry(
+            total=3,
+            backoff_factor=0.2,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=frozenset({"POST"}),
+        )
+        self._session = requests.Session()
+        self._session.headers.update(self.headers)
+        self._session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=8, max_retries=retry))
+        self._aclient: httpx.AsyncClient | None = None
+        self._persisted = self._persisted_hashes.setdefault(self.base_url, set())
+        # Orders by ID with their fetch time (least recently used first)
+        self.cache_ttl = cache_ttl
+        self._orders: OrderedDict[str, Tuple[float, Dict[str, Any]]] = OrderedDict()
+        self._orders_lock = threading.Lock()
 
     # -----------------------------
     # Public methods
@@ -45,20 +90,212 @@ class OrderLookup:
         if not order_id:
             return {"error": "missing_order_id"}
 
-        query = _GET_ORDER_BY_ID_QUERY
+        order = self._cached_order(order_id)
+        if order is not None:
+            return order
+
+        query = _GET_ORDER_BY_ID
         variables = {"id": f"gid://shopify/Order/{order_id}"}
         result = self._execute_query(query, variables)
-        order = result.get("data", {}).get("order") if result else None
-        return order if order else {"error": "not_found"}
+        return self._cache_order(order_id, self._order_from_result(result))
 
     def lookup_by_email(self, email: str) -> List[Dict[str, Any]] | Dict[str, str]:
         """Return list of orders for customer email or error dict."""
         if not email:
             return {"error": "missing_email"}
 
-        query = _GET_ORDERS_BY_EMAIL_QUERY
+        query = _GET_ORDERS_BY_EMAIL
         variables = {"query": f"email:{email}"}
         result = self._execute_query(query, variables)
+        return self._orders_from_result(result)
+
+    # -----------------------------
+    # Async public methods
+    # -----------------------------
+
+    @property
+    def aclient(self) -> httpx.AsyncClient:
+        """Shared HTTP/2 client, created on first async lookup."""
+        if self._aclient is None:
+            self._aclient = httpx.AsyncClient(
+                headers=self.headers,
+                http2=True,
+                timeout=15,
+            )
+        return self._aclient
+
+    async def alookup_by_id(self, order_id: str) -> Dict[str, Any]:
+        """Async variant of lookup_by_id."""
+        if not order_id:
+            return {"error": "missing_order_id"}
+
+        order = self._cached_order(order_id)
+        if order is not None:
+            return order
+
+        query = _GET_ORDER_BY_ID
+        variables = {"id": f"gid://shopify/Order/{order_id}"}
+        result = await self._aexecute_query(query, variables)
+        return self._cache_order(order_id, self._order_from_result(result))
+
+    async def alookup_by_email(self, email: str) -> List[Dict[str, Any]] | Dict[str, str]:
+        """Async variant of lookup_by_email."""
+        if not email:
+            return {"error": "missing_email"}
+
+        query = _GET_ORDERS_BY_EMAIL
+        variables = {"query": f"email:{email}"}
+        result = await self._aexecute_query(query, variables)
+        return self._orders_from_result(result)
+
+    async def alookup_many(self, order_ids: List[str]) -> List[Dict[str, Any]]:
+        """Look up several orders concurrently, preserving input order."""
+        return await asyncio.gather(*(self.alookup_by_id(order_id) for order_id in order_ids))
+
+    def invalidate(self, order_id: str) -> None:
+        """Drop a cached order, e.g. after refunding it."""
+        with self._orders_lock:
+            self._orders.pop(self._cache_key(order_id), None)
+
+    def close(self) -> None:
+        """Close pooled connections; call on process shutdown."""
+        self._session.close()
+
+    async def aclose(self) -> None:
+        """Close the async client if it was opened."""
+        if self._aclient is not None:
+            await self._aclient.aclose()
+            self._aclient = None
+
+    # -----------------------------
+    # Internal helpers
+    # -----------------------------
+
+    def _execute_query(self, query: Tuple[str, str], variables: Dict[str, Any]):
+        text, query_hash = query
+        payload = self._build_payload(text, query_hash, variables)
+        result = self._post(payload)
+        if self._needs_full_query(payload, query_hash, result):
+            payload = self._build_payload(text, query_hash, variables)
+            result = self._post(payload)
+        return result
+
+    async def _aexecute_query(self, query: Tuple[str, str], variables: Dict[str, Any]):
+        text, query_hash = query
+        payload = self._build_payload(text, query_hash, variables)
+        result = await self._apost(payload)
+        if self._needs_full_query(payload, query_hash, result):
+            payload = self._build_payload(text, query_hash, variables)
+            result = await self._apost(payload)
+        return result
+
+    def _post(self, payload: Dict[str, Any]):
+        try:
+            response = self._session.post(self.base_url, json=payload, timeout=15)
+            response.raise_for_status()
+            return orjson.loads(response.content)
+        except Exception as exc:  # broad catch – network & Shopify errors
+            return self._api_error(exc)
+
+    async def _apost(self, payload: Dict[str, Any]):
+        try:
+            response = await self.aclient.post(self.base_url, json=payload)
+            response.raise_for_status()
+            return orjson.loads(response.content)
+        except Exception as exc:  # broad catch – network & Shopify errors
+            return self._api_error(exc)
+
+    @staticmethod
+    def _api_error(exc: Exception) -> Dict[str, Any]:
+        logger.error("OrderLookup API error: %s", exc)
+        result: Dict[str, Any] = {"error": "api_error", "detail": str(exc)}
+        # Keep 4xx bodies: servers without persisted queries reject
+        # hash-only requests with a client error naming the missing query
+        response = getattr(exc, "response", None)
+        if response is not None and 400 <= response.status_code < 500:
+            result["body"] = response.content.decode("utf-8", "replace")
+        return result
+
+    @staticmethod
+    def _cache_key(order_id: str) -> str:
+        """Key orders by bare ID so "1001", "#1001" and the GID share an entry."""
+        return str(order_id).rsplit("/", 1)[-1].lstrip("#")
+
+    def _cached_order(self, order_id: str) -> Dict[str, Any] | None:
+        if not self.cache_ttl:
+            return None
+        key = self._cache_key(order_id)
+        with self._orders_lock:
+            entry = self._orders.get(key)
+            if entry is None:
+                return None
+            fetched_at, order = entry
+            if time.monotonic() - fetched_at >= self.cache_ttl:
+                del self._orders[key]
+                return None
+            self._orders.move_to_end(key)
+            return order
+
+    def _cache_order(self, order_id: str, order: Dict[str, Any]) -> Dict[str, Any]:
+        """Remember a found order (errors are never cached) and return it."""
+        if self.cache_ttl and "error" not in order:
+            key = self._cache_key(order_id)
+            with self._orders_lock:
+                self._orders[key] = (time.monotonic(), order)
+                self._orders.move_to_end(key)
+                if len(self._orders) > self.MAX_CACHED_ORDERS:
+                    self._orders.popitem(last=False)
+        return order
+
+    @property
+    def _use_apq(self) -> bool:
+        return self.base_url not in self._apq_unsupported
+
+    def _build_payload(self, text: str, query_hash: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        """Send only the query hash once the server has stored the query."""
+        payload: Dict[str, Any] = {"variables": variables}
+        if self._use_apq:
+            payload["extensions"] = {"persistedQuery": {"version": 1, "sha256Hash": query_hash}}
+            if query_hash in self._persisted:
+                return payload
+        payload["query"] = text
+        return payload
+
+    def _needs_full_query(self, payload: Dict[str, Any], query_hash: str, result: Dict[str, Any]) -> bool:
+        """Track persisted-query state; True if a hash-only request must be resent."""
+        if "query" in payload:
+            if self._use_apq and result.get("data"):
+                self._persisted.add(query_hash)
+            return False
+
+        if not self._rejects_persisted_query(result):
+            # Timeouts, 5xx and throttling are returned as-is, not resent
+            return False
+
+        # The server evicted the query, or does not support persisted
+        # queries at all; only the latter disables them for this endpoint
+        self._persisted.discard(query_hash)
+        if "PersistedQueryNotFound" not in str(result.get("errors")):
+            self._apq_unsupported.add(self.base_url)
+        return True
+
+    @staticmethod
+    def _rejects_persisted_query(result: Dict[str, Any]) -> bool:
+        """True if a hash-only request failed because of the missing query text."""
+        if result.get("data"):
+            return False
+        errors = str(result.get("errors") or "")
+        if any(code in errors for code in _PERSISTED_QUERY_ERRORS):
+            return True
+        return "query" in result.get("body", "")
+
+    @staticmethod
+    def _order_from_result(result: Dict[str, Any]) -> Dict[str, Any]:
+        order = result.get("data", {}).get("order") if result else None
+        return order if order else {"error": "not_found"}
+
+    @staticmethod
+    def _orders_from_result(result: Dict[str, Any]) -> List[Dict[str, Any]] | Dict[str, str]:
         edges = (
             result.get("data", {})
             .get("orders", {})
@@ -68,19 +305,9 @@ class OrderLookup:
         orders = [edge["node"] for edge in edges]
         return orders if orders else {"error": "not_found"}
 
-    # -----------------------------
-    # Internal helpers
-    # -----------------------------
 
-    def _execute_query(self, query: str, variables: Dict[str, Any]):
-        payload = {"query": query, "variables": variables}
-        try:
-            response = requests.post(self.base_url, json=payload, headers=self.headers, timeout=15)
-            response.raise_for_status()
-            return response.json()
-        except Exception as exc:  # broad catch – network & Shopify errors
-            logger.error("OrderLookup API error: %s", exc)
-            return {"error": "api_error", "detail": str(exc)}
+# GraphQL errors a server returns for a hash-only request it cannot serve
+_PERSISTED_QUERY_ERRORS = ("PersistedQueryNotFound", "PersistedQueryNotSupported")
 
 
 # -----------------------------
@@ -155,4 +382,14 @@ query getOrdersByEmail($query: String!) {
     }
   }
 }
-""" 
\ No newline at end of file
+""" 
+
+# (query text, SHA-256 hash) pairs for automatic persisted queries
+_GET_ORDER_BY_ID = (
+    _GET_ORDER_BY_ID_QUERY,
+    hashlib.sha256(_GET_ORDER_BY_ID_QUERY.encode()).hexdigest(),
+)
+_GET_ORDERS_BY_EMAIL = (
+    _GET_ORDERS_BY_EMAIL_QUERY,
+    hashlib.sha256(_GET_ORDERS_BY_EMAIL_QUERY.encode()).hexdigest(),
+)
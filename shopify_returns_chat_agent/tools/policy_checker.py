@@ -8,13 +8,45 @@ Example:
     result = pc.check_eligibility("2024-01-01T10:00:00Z", "item_123", "defective")
 """
 
-from datetime import datetime, timedelta
-from typing import Dict, List, Any
+from datetime import datetime
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, List, Any, Mapping, Sequence
+
+from tools import _policy_kernel
+
+# ciso8601 is optional: a C ISO 8601 parser that also accepts the Z suffix
+try:
+    from ciso8601 import parse_datetime as _fast_parse_datetime
+except ImportError:
+    _fast_parse_datetime = None
 
 
 class PolicyChecker:
     """Check return eligibility against store policies."""
 
+    # Decisions whose reason never varies are built once and shared
+    _DENY_MISSING_INFO = MappingProxyType({
+        "decision": "deny",
+        "reason": "Missing required information (order_date, item_id, or return_reason)."
+    })
+    _DENY_INVALID_DATE = MappingProxyType({
+        "decision": "deny",
+        "reason": "Invalid order date format."
+    })
+    _DENY_EXCLUDED_ITEM = MappingProxyType({
+        "decision": "deny",
+        "reason": "This item is not eligible for returns."
+    })
+    _FLAG_NEAR_EXPIRY = MappingProxyType({
+        "decision": "flag",
+        "reason": "Return is near the end of the return window. Flagged for manual review."
+    })
+    _APPROVE_DEFAULT = MappingProxyType({
+        "decision": "approve",
+        "reason": "Return meets all policy requirements."
+    })
+
     def __init__(self, store_policies: Dict[str, Any] = None):
         """Initialize with store policies or use defaults."""
         self.store_policies = store_policies or {
@@ -35,82 +67,139 @@ class PolicyChecker:
                 "wrong_item"
             ]
         }
-
-    def check_eligibility(self, order_date: str, item_id: str, return_reason: str) -> Dict[str, str]:
+        self._rebuild_lookups()
+
+    def _rebuild_lookups(self) -> None:
+        """Precompute membership sets and window thresholds from the policy."""
+        self._excluded = frozenset(self.store_policies["excluded_items"])
+        self._valid = frozenset(self.store_policies["valid_reasons"])
+        self._auto = frozenset(self.store_policies["auto_approve_reasons"])
+
+        self._window_days = int(self.store_policies["return_window_days"])
+        self._near_days = self._window_days - 5
+
+        # Decisions depend only on (elapsed days, item, reason) once the date
+        # is parsed, so repeat checks (confirmation retries, multi-item
+        # returns) are memoized. Rebuilt here so policy updates start fresh.
+        self._decide = lru_cache(maxsize=4096)(self._decide_uncached)
+
+        # Batch kernel encoding: reasons become indices into valid_reasons
+        # and auto-approve reasons a bitmask over those indices
+        reasons = self.store_policies["valid_reasons"]
+        if len(reasons) > _policy_kernel.MAX_REASONS:
+            self._reason_codes = None
+        else:
+            self._reason_codes = {reason: code for code, reason in enumerate(reasons)}
+            self._auto_mask = 0
+            for reason in self._auto:
+                if reason in self._reason_codes:
+                    self._auto_mask |= 1 << self._reason_codes[reason]
+
+    def check_eligibility(self, order_date: str, item_id: str, return_reason: str) -> Mapping[str, str]:
         """Check if return is eligible based on store policy.
         
         Args:
-            order_date: ISO format date string when order was placed
+            order_date: ISO format date string (or datetime) when order was placed
             item_id: Shopify item/variant ID
             return_reason: Customer's reason for return
             
         Returns:
-            Dict with 'decision' (approve/deny/flag) and 'reason' (explanation)
+            Read-only mapping with 'decision' (approve/deny/flag) and 'reason'
+            (explanation). Decisions are shared between calls; copy one
+            before modifying or storing it.
         """
         # Input validation
         if not all([order_date, item_id, return_reason]):
-            return {
-                "decision": "deny",
-                "reason": "Missing required information (order_date, item_id, or return_reason)."
-            }
+            return self._DENY_MISSING_INFO
 
         # Parse order date
         try:
-            if isinstance(order_date, str):
-                # Handle both Z and +00:00 timezone formats
-                order_date_clean = order_date.replace('Z', '+00:00')
-                order_dt = datetime.fromisoformat(order_date_clean)
-            else:
-                order_dt = order_date
+            order_dt = self._parse_order_date(order_date)
         except (ValueError, TypeError):
-            return {
-                "decision": "deny", 
-                "reason": "Invalid order date format."
-            }
+            return self._DENY_INVALID_DATE
 
+        elapsed_days = (datetime.now(tz=order_dt.tzinfo) - order_dt).days
+        return self._decide(elapsed_days, item_id, return_reason)
+
+    def _decide_uncached(self, days: int, item_id: str, return_reason: str) -> Mapping[str, str]:
+        """Apply the policy rules to a parsed return; see check_eligibility."""
+        # Results are memoized and shared, so every decision is read-only
         # Check excluded items
-        if item_id in self.store_policies["excluded_items"]:
-            return {
-                "decision": "deny",
-                "reason": "This item is not eligible for returns."
-            }
+        if item_id in self._excluded:
+            return self._DENY_EXCLUDED_ITEM
 
         # Check valid return reasons
-        if return_reason not in self.store_policies["valid_reasons"]:
-            return {
+        if return_reason not in self._valid:
+            return MappingProxyType({
                 "decision": "deny",
                 "reason": f"Invalid return reason. Valid reasons: {', '.join(self.store_policies['valid_reasons'])}"
-            }
+            })
 
         # Check return window
-        current_date = datetime.now().replace(tzinfo=order_dt.tzinfo)
-        days_since_order = (current_date - order_dt).days
-
-        if days_since_order > self.store_policies["return_window_days"]:
-            return {
+        if days > self._window_days:
+            return MappingProxyType({
                 "decision": "deny",
-                "reason": f"Return window of {self.store_policies['return_window_days']} days has expired."
-            }
+                "reason": f"Return window of {self._window_days} days has expired."
+            })
 
         # Auto-approve certain reasons
-        if return_reason in self.store_policies["auto_approve_reasons"]:
-            return {
+        if return_reason in self._auto:
+            return MappingProxyType({
                 "decision": "approve",
                 "reason": f"Return automatically approved for reason: {return_reason}"
-            }
+            })
 
         # Flag near end of return window for manual review
-        if days_since_order > (self.store_policies["return_window_days"] - 5):
-            return {
-                "decision": "flag",
-                "reason": "Return is near the end of the return window. Flagged for manual review."
-            }
+        if days > self._near_days:
+            return self._FLAG_NEAR_EXPIRY
 
         # Default approve
-        return {
-            "decision": "approve",
-            "reason": "Return meets all policy requirements."
-        }
+        return self._APPROVE_DEFAULT
+
+    def check_many(
+        self,
+        order_dates: Sequence[Any],
+        item_ids: Sequence[str],
+        return_reasons: Sequence[str],
+    ) -> List[str]:
+        """Return approve/deny/flag decisions for many returns at once.
+
+        Applies the same rules as check_eligibility, but only produces the
+        decision, which lets the scoring run in a single (numba-compiled,
+        when available) kernel call for bulk reporting and backfills.
+        """
+        if self._reason_codes is None:
+            return [
+                self.check_eligibility(order_date, item_id, reason)["decision"]
+                for order_date, item_id, reason in zip(order_dates, item_ids, return_reasons)
+            ]
+
+        days, codes, excluded = [], [], []
+        for order_date, item_id, reason in zip(order_dates, item_ids, return_reasons):
+            code = self._reason_codes.get(reason, _policy_kernel.INVALID_REASON)
+            try:
+                order_dt = self._parse_order_date(order_date)
+                elapsed_days = (datetime.now(tz=order_dt.tzinfo) - order_dt).days
+            except (ValueError, TypeError, AttributeError):
+                # Missing or unparseable dates are denied like invalid reasons
+                elapsed_days, code = 0, _policy_kernel.INVALID_REASON
+            if not (order_date and item_id and reason):
+                code = _policy_kernel.INVALID_REASON
+            days.append(elapsed_days)
+            codes.append(code)
+            excluded.append(1 if item_id in self._excluded else 0)
+
+        scores = _policy_kernel.score_many(
+            days, codes, excluded, self._window_days, self._near_days, self._auto_mask
+        )
+        return [_DECISIONS[score] for score in scores]
+
+    @staticmethod
+    def _parse_order_date(order_date: Any) -> datetime:
+        """Parse an ISO order date; datetimes are passed through unchanged."""
+        if isinstance(order_date, str):
+            return _parse_iso_date(order_date)
+        return order_date
 
     def get_policy_summary(self) -> Dict[str, Any]:
         """Return current policy configuration."""
@@ -118,4 +207,23 @@ class PolicyChecker:
 
     def update_policy(self, policy_updates: Dict[str, Any]) -> None:
         """Update store policies."""
-        self.store_policies.update(policy_updates) 
\ No newline at end of file
+        self.store_policies.update(policy_updates)
+        self._rebuild_lookups() 
+
+
+@lru_cache(maxsize=1024)
+def _parse_iso_date(order_date: str) -> datetime:
+    """Parse an ISO date string, accepting both Z and +00:00 suffixes.
+
+    Cached because multi-item returns check the same order date per item.
+    """
+    if _fast_parse_datetime is not None:
+        return _fast_parse_datetime(order_date)
+    return datetime.fromisoformat(order_date.replace('Z', '+00:00'))
+
+
+_DECISIONS = {
+    _policy_kernel.DENY: "deny",
+    _policy_kernel.FLAG: "flag",
+    _policy_kernel.APPROVE: "approve",
+}
@@ -11,9 +11,16 @@ Example:
 
 from __future__ import annotations
 
+import asyncio
 import logging
+from functools import lru_cache
+import httpx
+import orjson
 import requests
-from typing import Any, Dict, Optional
+from requests.adapters import HTTPAdapter
+from types import MappingProxyType
+from typing import Any, Dict, List, Optional, Tuple
+from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 
@@ -22,17 +29,40 @@ class RefundProcessor:
     """Process refunds for approved returns via Shopify Admin API."""
 
     API_VERSION = "2023-10"
+    # Aliased refundCreate mutations per bulk request, kept well under
+    # Shopify's GraphQL query cost limit
+    BULK_BATCH_SIZE = 25
+    _BASE_URL_TEMPLATE = "https://{domain}/admin/api/{version}/graphql.json"
+    _BASE_HEADERS = MappingProxyType({"Content-Type": "application/json"})
 
     def __init__(self, admin_token: str, store_domain: str):
         if not admin_token or not store_domain:
             raise ValueError("admin_token and store_domain are required")
         self.admin_token = admin_token
         self.store_domain = store_domain.rstrip("/")
-        self.base_url = f"https://{self.store_domain}/admin/api/{self.API_VERSION}/graphql.json"
-        self.headers = {
-            "Content-Type": "application/json",
-            "X-Shopify-Access-Token": self.admin_token,
-        }
+        self.base_url = self._BASE_URL_TEMPLATE.format(domain=self.store_domain, version=self.API_VERSION)
+        # Built once; the pooled clients send it on every request
+        self.headers = {**self._BASE_HEADERS, "X-Shopify-Access-Token": self.admin_token}
+        # Reuse keep-alive connections across refunds. Refunds are not
+        # idempotent, so only retry when Shopify cannot have applied the
+        # mutation: failed connects and throttled (429) responses.
+        retry = Retry(
+            total=3,
+            connect=3,
+            read=0,
+            status=3,
+            backoff_factor=0.3,
+            status_forcelist=[429],
+            allowed_methods=frozenset({"POST"}),
+        )
+        self._session = requests.Session()
+        self._session.headers.update(self.headers)
+        self._session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=50, max_retries=retry))
+        self._aclient: httpx.AsyncClient | None = None
+
+    def close(self) -> None:
+        """Close pooled connections; call on process shutdown."""
+        self._session.close()
 
     def process_refund(
         self, 
@@ -54,56 +84,162 @@ class RefundProcessor:
         Returns:
             Dict with success/error status and refund details
         """
-        # Validation
+        error = self._validate(order_id, line_item_id, amount)
+        if error:
+            return error
+
+        mutation, variables = self._refund_request(order_id, line_item_id, amount, quantity, reason)
+        return self._execute_mutation(mutation, variables)
+
+    def process_refunds_bulk(self, refunds: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Process many refunds with one request per batch of aliased mutations.
+
+        Args:
+            refunds: process_refund keyword arguments, one dict per refund
+
+        Returns:
+            One process_refund-style result per input, in input order
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(refunds)
+        pending = []
+        for index, refund in enumerate(refunds):
+            error = self._validate(refund.get("order_id"), refund.get("line_item_id"), refund.get("amount"))
+            if error:
+                results[index] = error
+                continue
+            mutation, variables = self._refund_request(
+                refund["order_id"],
+                refund.get("line_item_id"),
+                refund.get("amount"),
+                refund.get("quantity"),
+                refund.get("reason", "customer_request"),
+            )
+            pending.append((index, mutation, variables))
+
+        for start in range(0, len(pending), self.BULK_BATCH_SIZE):
+            batch = pending[start:start + self.BULK_BATCH_SIZE]
+            payload = _bulk_payload([(mutation, variables) for _, mutation, variables in batch])
+            result = self._post(orjson.dumps(payload))
+            for alias, (index, _, _) in enumerate(batch):
+                results[index] = self._refund_from_bulk_result(result, f"r{alias}")
+        return results
+
+    # -----------------------------
+    # Async public methods
+    # -----------------------------
+
+    @property
+    def aclient(self) -> httpx.AsyncClient:
+        """Shared HTTP/2 client, created on first async refund."""
+        if self._aclient is None:
+            self._aclient = httpx.AsyncClient(
+                headers=self.headers,
+                http2=True,
+                timeout=15,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+            )
+        return self._aclient
+
+    async def aprocess_refund(
+        self,
+        order_id: str,
+        line_item_id: Optional[str] = None,
+        amount: Optional[float] = None,
+        quantity: Optional[int] = None,
+        reason: str = "customer_request"
+    ) -> Dict[str, Any]:
+        """Async variant of process_refund."""
+        error = self._validate(order_id, line_item_id, amount)
+        if error:
+            return error
+
+        mutation, variables = self._refund_request(order_id, line_item_id, amount, quantity, reason)
+        return await self._aexecute_mutation(mutation, variables)
+
+    async def aprocess_many(self, refunds: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Process several refunds concurrently, preserving input order.
+
+        Each item holds process_refund keyword arguments; the mutations
+        are multiplexed over the shared HTTP/2 connection.
+        """
+        return await asyncio.gather(*(self.aprocess_refund(**refund) for refund in refunds))
+
+    async def aclose(self) -> None:
+        """Close the async client if it was opened."""
+        if self._aclient is not None:
+            await self._aclient.aclose()
+            self._aclient = None
+
+    # -----------------------------
+    # Internal helpers
+    # -----------------------------
+
+    @staticmethod
+    def _validate(order_id: str, line_item_id: Optional[str], amount: Optional[float]) -> Optional[Dict[str, str]]:
         if not order_id:
             return {"error": "order_id is required"}
-        
+
         if not line_item_id and not amount:
             return {"error": "Either line_item_id or amount must be specified"}
+        return None
 
-        # Format IDs for GraphQL
-        order_gid = self._format_order_id(order_id)
-        line_item_gid = self._format_line_item_id(line_item_id) if line_item_id else None
-
-        # Process refund based on what's specified
-        if line_item_gid:
-            return self._refund_line_item(order_gid, line_item_gid, quantity or 1, reason)
-        elif amount:
-            return self._refund_amount(order_gid, amount, reason)
-
-    def _refund_line_item(self, order_id: str, line_item_id: str, quantity: int, reason: str) -> Dict[str, Any]:
-        """Refund a specific line item."""
-        mutation = _REFUND_LINE_ITEM_MUTATION
-        variables = {
-            "orderId": order_id,
-            "lineItemId": line_item_id,
-            "quantity": quantity,
-            "reason": reason
-        }
-        return self._execute_mutation(mutation, variables)
-
-    def _refund_amount(self, order_id: str, amount: float, reason: str) -> Dict[str, Any]:
-        """Refund a specific amount."""
-        mutation = _REFUND_AMOUNT_MUTATION
-        variables = {
-            "orderId": order_id,
+    def _refund_request(
+        self,
+        order_id: str,
+        line_item_id: Optional[str],
+        amount: Optional[float],
+        quantity: Optional[int],
+        reason: str
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Return the mutation and variables for a validated refund."""
+        # Refund the line item if given, otherwise the amount; each branch
+        # formats only the GraphQL IDs it sends
+        if line_item_id:
+            return _REFUND_LINE_ITEM_MUTATION, {
+                "orderId": self._format_order_id(order_id),
+                "lineItemId": self._format_line_item_id(line_item_id),
+                "quantity": quantity or 1,
+                "reason": reason
+            }
+        return _REFUND_AMOUNT_MUTATION, {
+            "orderId": self._format_order_id(order_id),
             "amount": str(amount),
             "reason": reason
         }
-        return self._execute_mutation(mutation, variables)
 
     def _execute_mutation(self, mutation: str, variables: Dict[str, Any]) -> Dict[str, Any]:
         """Execute GraphQL mutation against Shopify Admin API."""
-        payload = {"query": mutation, "variables": variables}
-        
+        result = self._post(_mutation_body(mutation, variables))
+        if "error" in result:
+            return result
+        return self._refund_from_result(result)
+
+    def _post(self, body: bytes) -> Dict[str, Any]:
         try:
-            response = requests.post(self.base_url, json=payload, headers=self.headers, timeout=15)
+            response = self._session.post(self.base_url, data=body, timeout=15)
             response.raise_for_status()
-            result = response.json()
+            return orjson.loads(response.content)
         except Exception as exc:
             logger.error("RefundProcessor API error: %s", exc)
             return {"error": "api_error", "detail": str(exc)}
 
+    async def _aexecute_mutation(self, mutation: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        result = await self._apost(_mutation_body(mutation, variables))
+        if "error" in result:
+            return result
+        return self._refund_from_result(result)
+
+    async def _apost(self, body: bytes) -> Dict[str, Any]:
+        try:
+            response = await self.aclient.post(self.base_url, content=body)
+            response.raise_for_status()
+            return orjson.loads(response.content)
+        except Exception as exc:
+            logger.error("RefundProcessor API error: %s", exc)
+            return {"error": "api_error", "detail": str(exc)}
+
+    @staticmethod
+    def _refund_from_result(result: Dict[str, Any]) -> Dict[str, Any]:
         # Check for GraphQL errors
         if "errors" in result:
             error_msg = result["errors"][0]["message"]
@@ -130,56 +266,110 @@ class RefundProcessor:
 
         return {"error": "Unknown error occurred during refund processing"}
 
-    def _format_order_id(self, order_id: str) -> str:
+    @classmethod
+    def _refund_from_bulk_result(cls, result: Dict[str, Any], alias: str) -> Dict[str, Any]:
+        """Extract one aliased refundCreate result from a bulk response."""
+        if "error" in result:
+            return result
+        refund_data = (result.get("data") or {}).get(alias)
+        if refund_data is None and "errors" in result:
+            # Report this alias's own error; errors without a path apply to all
+            errors = result["errors"]
+            own = [error for error in errors if (error.get("path") or [None])[0] == alias]
+            return cls._refund_from_result({"errors": own or errors})
+        return cls._refund_from_result({"data": {"refundCreate": refund_data or {}}})
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _format_order_id(order_id: str) -> str:
         """Format order ID for GraphQL."""
         if order_id.startswith("gid://"):
             return order_id
         return f"gid://shopify/Order/{order_id}"
 
-    def _format_line_item_id(self, line_item_id: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _format_line_item_id(line_item_id: str) -> str:
         """Format line item ID for GraphQL."""
         if line_item_id.startswith("gid://"):
             return line_item_id
         return f"gid://shopify/LineItem/{line_item_id}"
 
 
-# GraphQL mutations
-_REFUND_LINE_ITEM_MUTATION = """
-mutation refundLineItem($orderId: ID!, $lineItemId: ID!, $quantity: Int!, $reason: String) {
-  refundCreate(input: {
-    orderId: $orderId,
-    shipping: { fullRefund: true },
-    refundLineItems: [{ lineItemId: $lineItemId, quantity: $quantity }],
-    note: $reason
-  }) {
-    refund {
-      id
-      createdAt
-    }
-    userErrors {
-      field
-      message
-    }
-  }
+# GraphQL mutations, built from one refundCreate template. Each refund kind
+# supplies its variable declarations and refund input; {i} suffixes every
+# variable ("" in a single-refund mutation, the alias index in a bulk one).
+_REFUND_INPUTS = {
+    "refundLineItem": (
+        "$orderId{i}: ID!, $lineItemId{i}: ID!, $quantity{i}: Int!, $reason{i}: String",
+        "refundLineItems: [{{ lineItemId: $lineItemId{i}, quantity: $quantity{i} }}]",
+    ),
+    "refundAmount": (
+        "$orderId{i}: ID!, $amount{i}: String!, $reason{i}: String",
+        "transactions: [{{ amount: $amount{i} }}]",
+    ),
 }
-"""
 
-_REFUND_AMOUNT_MUTATION = """
-mutation refundAmount($orderId: ID!, $amount: String!, $reason: String) {
-  refundCreate(input: {
-    orderId: $orderId,
-    shipping: { fullRefund: true },
-    transactions: [{ amount: $amount }],
-    note: $reason
-  }) {
-    refund {
+_REFUND_FIELD = """
+  {alias}refundCreate(input: {{
+    orderId: $orderId{i},
+    shipping: {{ fullRefund: true }},
+    {refund_input},
+    note: $reason{i}
+  }}) {{
+    refund {{
       id
       createdAt
-    }
-    userErrors {
+    }}
+    userErrors {{
       field
       message
-    }
-  }
+    }}
+  }}"""
+
+
+def _refund_document(name: str, kinds: List[str], aliased: bool = False) -> str:
+    """Build a mutation with one refundCreate field per refund kind."""
+    declarations, fields = [], []
+    for i, kind in enumerate(kinds):
+        suffix = i if aliased else ""
+        declaration, refund_input = _REFUND_INPUTS[kind]
+        declarations.append(declaration.format(i=suffix))
+        fields.append(_REFUND_FIELD.format(
+            alias=f"r{i}: " if aliased else "",
+            i=suffix,
+            refund_input=refund_input.format(i=suffix),
+        ))
+    return f"mutation {name}({', '.join(declarations)}) {{{''.join(fields)}\n}}\n"
+
+
+_REFUND_LINE_ITEM_MUTATION = _refund_document("refundLineItem", ["refundLineItem"])
+_REFUND_AMOUNT_MUTATION = _refund_document("refundAmount", ["refundAmount"])
+
+# Refund kind of each single mutation, for combining them into a bulk one
+_MUTATION_KINDS = {
+    _REFUND_LINE_ITEM_MUTATION: "refundLineItem",
+    _REFUND_AMOUNT_MUTATION: "refundAmount",
 }
-""" 
\ No newline at end of file
+
+
+# The mutation text never changes, so its JSON encoding is done once and
+# only the variables are serialized per request
+_BODY_PREFIXES = {
+    mutation: b'{"query":' + orjson.dumps(mutation) + b',"variables":'
+    for mutation in (_REFUND_LINE_ITEM_MUTATION, _REFUND_AMOUNT_MUTATION)
+}
+
+
+def _mutation_body(mutation: str, variables: Dict[str, Any]) -> bytes:
+    """Encode a refund mutation request body."""
+    return _BODY_PREFIXES[mutation] + orjson.dumps(variables) + b"}"
+
+
+def _bulk_payload(refunds: List[Tuple[str, Dict[str, Any]]]) -> Dict[str, Any]:
+    """Combine (mutation, variables) pairs into one aliased mutation payload."""
+    kinds, variables = [], {}
+    for i, (mutation, refund_variables) in enumerate(refunds):
+        kinds.append(_MUTATION_KINDS[mutation])
+        variables.update({f"{name}{i}": value for name, value in refund_variables.items()})
+    return {"query": _refund_document("bulkRefund", kinds, aliased=True), "variables": variables}
@@ -12,12 +12,14 @@ from agents.returns_agent import ReturnsAgent
 
 class TestReturnsAgent(unittest.TestCase):
     
-    def setUp(self):
-        """Set up test fixtures"""
-        self.agent = ReturnsAgent(return_window_days=30)
+    @classmethod
+    def setUpClass(cls):
+        """Set up shared test fixtures once for the class"""
+        # Tests only read from these; the approve test builds its own agent
+        cls.agent = ReturnsAgent(return_window_days=30)
         
         # Sample webhook data
-        self.sample_webhook = {
+        cls.sample_webhook = {
             'order_id': '12345',
             'amount': 99.99,
             'created_at': (datetime.now() - timedelta(days=10)).isoformat(),